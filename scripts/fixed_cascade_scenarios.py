@@ -6,7 +6,6 @@ Includes circuit breakers to prevent infinite cascade loops
 
 import json
 import random
-import copy
 from dataclasses import dataclass
 from typing import List, Dict, Any, Set
 from pathlib import Path
@@ -27,7 +26,7 @@ class HazardType(Enum):
     SUPPLY_CHAIN = "supply_chain"
     COMMUNICATION_FAILURE = "communication_failure"
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CascadeEvent:
     """Individual cascade event in multi-hazard scenario"""
     event_id: str
@@ -53,6 +52,44 @@ class CascadeEvent:
             'description': self.description
         }
 
+SYSTEMS = (
+    "power_grid", "water_system", "communication_network", 
+    "transport_network", "emergency_services", "digital_infrastructure",
+    "pumping_stations", "flood_barriers", "sensor_network"
+)
+_FULLY_OPERATIONAL = dict.fromkeys(SYSTEMS, 1.0)
+
+# Per-agent cascade effects, dispatched on hazard type by apply_agent_cascade_effects
+_POWER_DEPENDENT_CAPS = frozenset({'electricity', 'pumping', 'monitoring'})
+
+def _apply_cyber_attack(agent: VeniceAgent, severity: float):
+    """Cyber attacks affect digital systems"""
+    if 'pumping' in agent.capabilities:
+        agent.cyber_disruption = severity * 0.8
+    if 'coordination' in agent.capabilities:
+        agent.comm_disruption = severity * 0.5
+
+def _apply_power_outage(agent: VeniceAgent, severity: float):
+    """Power outages affect electrical systems"""
+    if not _POWER_DEPENDENT_CAPS.isdisjoint(agent.capabilities):
+        agent.power_disruption = severity * 0.7
+
+def _apply_infrastructure_failure(agent: VeniceAgent, severity: float):
+    """Infrastructure failures reduce effectiveness"""
+    agent.effectiveness = agent.effectiveness * (1 - severity * 0.4)
+
+def _apply_communication_failure(agent: VeniceAgent, severity: float):
+    """Communication failures increase message failure rates"""
+    base_failure = 0.1
+    agent.message_failure_rate = min(0.8, base_failure + severity * 0.3)
+
+_AGENT_EFFECT_HANDLERS = {
+    HazardType.CYBER_ATTACK: _apply_cyber_attack,
+    HazardType.POWER_OUTAGE: _apply_power_outage,
+    HazardType.INFRASTRUCTURE_FAILURE: _apply_infrastructure_failure,
+    HazardType.COMMUNICATION_FAILURE: _apply_communication_failure,
+}
+
 class FixedMultiHazardSimulation(FloodSimulation):
     """Fixed simulation with circuit breakers for cascade loops"""
     
@@ -63,24 +100,37 @@ class FixedMultiHazardSimulation(FloodSimulation):
         self.active_events: Set[str] = set()
         self.system_states: Dict[str, float] = {}
         self.cascade_log: List[Dict] = []
-        self.cascade_history: Set[str] = set()  # Track generated cascades to prevent loops
         self.max_cascades_per_tick = 5  # Circuit breaker
+        self._scenario_cache: Dict[str, List[CascadeEvent]] = {}  # Agents are fixed, so events are too
         
         # Initialize system states
         self.initialize_system_states()
         
+        for agent in self.agents.values():
+            self.reset_agent_cascade_state(agent)
+        
         logger.info(f"FixedMultiHazardSimulation initialized with {len(self.agents)} agents")
     
     def initialize_system_states(self):
         """Initialize cyber-physical system states"""
-        systems = [
-            "power_grid", "water_system", "communication_network", 
-            "transport_network", "emergency_services", "digital_infrastructure",
-            "pumping_stations", "flood_barriers", "sensor_network"
-        ]
+        self.system_states.update(_FULLY_OPERATIONAL)
         
-        for system in systems:
-            self.system_states[system] = 1.0  # Fully operational
+        # Lowest state reached per system and running total, maintained by apply_cascade_effects
+        self.system_state_minimums: Dict[str, float] = dict(self.system_states)
+        self._system_states_sum = sum(self.system_states.values())
+    
+    @property
+    def mean_system_state(self) -> float:
+        """Mean operational level across systems (1.0 = all fully operational)"""
+        return self._system_states_sum / len(self.system_states)
+    
+    def reset_agent_cascade_state(self, agent: VeniceAgent):
+        """Give the agent zeroed cascade fields so hot paths can read them directly"""
+        agent.cyber_disruption = 0.0
+        agent.power_disruption = 0.0
+        agent.comm_disruption = 0.0
+        agent.effectiveness = 1.0
+        agent.message_failure_rate = None  # Only set by communication failures
     
     def create_scenario_events(self, scenario_name: str) -> List[CascadeEvent]:
         """Create predefined scenario events with realistic cascade patterns"""
@@ -237,15 +287,23 @@ class FixedMultiHazardSimulation(FloodSimulation):
         for system, impact in system_impacts.items():
             old_state = self.system_states.get(system, 1.0)
             new_state = max(0.0, old_state - (impact * event.severity))
+            self._system_states_sum += new_state - self.system_states.get(system, 0.0)
             self.system_states[system] = new_state
+            if new_state < self.system_state_minimums.get(system, 1.0):
+                self.system_state_minimums[system] = new_state
             
             if old_state - new_state > 0.1:  # Significant degradation
                 logger.warning(f"System {system}: {old_state:.2f} → {new_state:.2f}")
         
-        # Apply effects to specific agents
-        for agent_id in event.affected_agents:
-            if agent_id in self.agents:
-                self.apply_agent_cascade_effects(self.agents[agent_id], event)
+        # Apply effects to specific agents (handler resolved once per event)
+        handler = _AGENT_EFFECT_HANDLERS.get(event.hazard_type)
+        if handler is not None:
+            agents = self.agents
+            severity = event.severity
+            for agent_id in event.affected_agents:
+                agent = agents.get(agent_id)
+                if agent is not None:
+                    handler(agent, severity)
         
         # Log cascade event
         self.cascade_log.append({
@@ -253,7 +311,7 @@ class FixedMultiHazardSimulation(FloodSimulation):
             'event_id': event.event_id,
             'description': event.description,
             'affected_agents': len(event.affected_agents),
-            'system_states': copy.deepcopy(self.system_states),
+            'system_states': dict(self.system_states),
             'severity': event.severity
         })
     
@@ -311,46 +369,22 @@ class FixedMultiHazardSimulation(FloodSimulation):
     def apply_agent_cascade_effects(self, agent: VeniceAgent, event: CascadeEvent):
         """Apply cascade event effects to individual agent"""
         
-        # Cyber attacks affect digital systems
-        if event.hazard_type == HazardType.CYBER_ATTACK:
-            if 'pumping' in agent.capabilities:
-                agent.cyber_disruption = event.severity * 0.8
-            if 'coordination' in agent.capabilities:
-                agent.comm_disruption = event.severity * 0.5
-                
-        # Power outages affect electrical systems
-        elif event.hazard_type == HazardType.POWER_OUTAGE:
-            if any(cap in ['electricity', 'pumping', 'monitoring'] for cap in agent.capabilities):
-                agent.power_disruption = event.severity * 0.7
-                
-        # Infrastructure failures reduce effectiveness
-        elif event.hazard_type == HazardType.INFRASTRUCTURE_FAILURE:
-            agent.effectiveness = getattr(agent, 'effectiveness', 1.0) * (1 - event.severity * 0.4)
-                
-        # Communication failures increase message failure rates
-        elif event.hazard_type == HazardType.COMMUNICATION_FAILURE:
-            base_failure = 0.1
-            agent.message_failure_rate = min(0.8, base_failure + event.severity * 0.3)
+        handler = _AGENT_EFFECT_HANDLERS.get(event.hazard_type)
+        if handler is not None:
+            handler(agent, event.severity)
     
     def calculate_agent_failure_probability(self, agent: VeniceAgent) -> float:
         """Calculate dynamic failure probability based on cascade effects"""
         base_p_fail = 0.1
         
-        # Accumulate failure probability from various disruptions
-        total_disruption = 0.0
-        
-        if hasattr(agent, 'cyber_disruption'):
-            total_disruption += agent.cyber_disruption * 0.3
-            
-        if hasattr(agent, 'power_disruption'):
-            total_disruption += agent.power_disruption * 0.4
-            
-        if hasattr(agent, 'comm_disruption'):
-            total_disruption += agent.comm_disruption * 0.2
-            
-        if hasattr(agent, 'message_failure_rate'):
+        if agent.message_failure_rate is not None:
             return agent.message_failure_rate
         
+        # Accumulate failure probability from various disruptions
+        total_disruption = (agent.cyber_disruption * 0.3 +
+                            agent.power_disruption * 0.4 +
+                            agent.comm_disruption * 0.2)
+        
         return min(0.8, base_p_fail + total_disruption)
     
     def run_cascade_scenario(self, scenario_name: str, max_ticks: int = 120, **scenario_params):
@@ -361,11 +395,17 @@ class FixedMultiHazardSimulation(FloodSimulation):
         # Reset simulation
         self.reset_simulation()
         
-        # Create scenario events
-        self.cascade_events = self.create_scenario_events(scenario_name)
+        # Create scenario events (cached per scenario - events are never mutated)
+        if scenario_name not in self._scenario_cache:
+            self._scenario_cache[scenario_name] = self.create_scenario_events(scenario_name)
+        self.cascade_events = list(self._scenario_cache[scenario_name])
         
         logger.info(f"Loaded {len(self.cascade_events)} cascade events for scenario {scenario_name}")
         
+        # Loop invariants
+        equity_weighting = scenario_params.get('equity_weighting', 0.0)
+        agents = self.agents
+        
         # Run simulation
         for tick in range(max_ticks):
             self.current_tick = tick
@@ -390,17 +430,17 @@ class FixedMultiHazardSimulation(FloodSimulation):
             self.update_flood_progression(tick, max_ticks)
             
             # Process agent turns with cascade effects
-            agent_order = list(self.agents.keys())
+            agent_order = list(agents.keys())
             random.shuffle(agent_order)
             
             for agent_id in agent_order:
-                agent = self.agents[agent_id]
+                agent = agents[agent_id]
                 
                 # Calculate dynamic failure probability
                 p_fail = self.calculate_agent_failure_probability(agent)
                 
                 # Process agent turn
-                self.process_agent_turn(agent, p_fail, scenario_params.get('equity_weighting', 0.0))
+                self.process_agent_turn(agent, p_fail, equity_weighting)
             
             # Take snapshot
             self.take_cascade_snapshot()
@@ -429,15 +469,11 @@ class FixedMultiHazardSimulation(FloodSimulation):
             agent.last_update_tick = 0
             
             # Reset cascade-specific attributes
-            for attr in ['cyber_disruption', 'comm_disruption', 'power_disruption', 
-                        'effectiveness', 'message_failure_rate']:
-                if hasattr(agent, attr):
-                    delattr(agent, attr)
+            self.reset_agent_cascade_state(agent)
         
         self.message_log = []
         self.tick_snapshots = []
         self.cascade_log = []
-        self.cascade_history = set()
         self.current_tick = 0
         self.flood_stage = 0
         self.active_events = set()
@@ -461,37 +497,45 @@ class FixedMultiHazardSimulation(FloodSimulation):
             self.set_flood_stage(new_stage)
             logger.info(f"Tick {tick}: Flood stage {old_stage} → {new_stage}")
     
+    def agent_queue_length(self, agent: VeniceAgent) -> int:
+        """Messages waiting for the agent's next turn"""
+        return len(agent.message_queue)
+    
     def take_cascade_snapshot(self):
         """Take snapshot with cascade information"""
         snapshot = {
             'tick': self.current_tick,
             'flood_stage': self.flood_stage,
             'active_events': list(self.active_events),
-            'system_states': copy.deepcopy(self.system_states),
+            'system_states': dict(self.system_states),
             'agents': {}
         }
         
         for agent_id, agent in self.agents.items():
-            agent_state = {
-                'status': agent.status,
-                'queue_len': len(agent.message_queue),
-                'unmet_needs': len(agent.unmet_needs),
-                'pending_requests': len(agent.pending_requests),
-                'committed_support': len(agent.committed_support),
-                'vulnerability': agent.vulnerability,
-                'sector': agent.sector,
-                'cascade_effects': {
-                    'cyber_disruption': getattr(agent, 'cyber_disruption', 0.0),
-                    'power_disruption': getattr(agent, 'power_disruption', 0.0),
-                    'comm_disruption': getattr(agent, 'comm_disruption', 0.0),
-                    'effectiveness': getattr(agent, 'effectiveness', 1.0),
-                    'message_failure_rate': getattr(agent, 'message_failure_rate', 0.1)
-                }
-            }
-            snapshot['agents'][agent_id] = agent_state
+            snapshot['agents'][agent_id] = self.agent_snapshot_state(agent)
         
         self.tick_snapshots.append(snapshot)
     
+    def agent_snapshot_state(self, agent: VeniceAgent) -> Dict[str, Any]:
+        """One agent's entry in a cascade snapshot"""
+        return {
+            'status': agent.status,
+            'queue_len': self.agent_queue_length(agent),
+            'unmet_needs': len(agent.unmet_needs),
+            'pending_requests': len(agent.pending_requests),
+            'committed_support': len(agent.committed_support),
+            'vulnerability': agent.vulnerability,
+            'sector': agent.sector,
+            'cascade_effects': {
+                'cyber_disruption': agent.cyber_disruption,
+                'power_disruption': agent.power_disruption,
+                'comm_disruption': agent.comm_disruption,
+                'effectiveness': agent.effectiveness,
+                'message_failure_rate': (agent.message_failure_rate
+                                         if agent.message_failure_rate is not None else 0.1)
+            }
+        }
+    
     def get_cascade_results(self) -> Dict[str, Any]:
         """Calculate enhanced metrics for cascade scenarios"""
         
@@ -509,8 +553,7 @@ class FixedMultiHazardSimulation(FloodSimulation):
         
         # Calculate system degradation
         for system in self.system_states.keys():
-            min_state = min([snap['system_states'].get(system, 1.0) 
-                           for snap in self.tick_snapshots if 'system_states' in snap] + [1.0])
+            min_state = self.system_state_minimums.get(system, 1.0)
             cascade_results['system_degradation'][system] = 1.0 - min_state
         
         # Calculate maximum simultaneous events
@@ -6,36 +6,191 @@ True behavioral integration - LLM drives coordination decisions, not just conten
 
 import json
 import random
-import copy
 import os
+import asyncio
+import hashlib
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, deque
+from collections.abc import Mapping
 from dataclasses import dataclass
-from typing import List, Dict, Any, Set, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple
 from pathlib import Path
+from string import Template
 from loguru import logger
 import sys
 from datetime import datetime
 import numpy as np
 from enum import Enum
 import openai
+import httpx
 from dotenv import load_dotenv
 import re
 
 # Import base frameworks
 from fixed_cascade_scenarios import FixedMultiHazardSimulation, CascadeEvent, HazardType
 from venice_flood_simulation import VeniceAgent
+from llm_parallel import RETRYABLE_LLM_ERRORS, AsyncTokenBucket, create_with_retries
 
 # Load environment variables
 load_dotenv(dotenv_path='.env')
 
+# Neutral, parseable answers returned while prompts are being recorded for the Batch API
+_BATCH_PLACEHOLDER_DECISION = ("DECISION:negotiate\nCONFIDENCE:0.5\nREASONING:Awaiting batch response\n"
+                               "CONDITIONS:none\nPRIORITY:0.5\nPARTNERSHIP:0.5")
+_BATCH_PLACEHOLDER_EFFECTIVENESS = "URGENCY:0.5 AUTHENTICITY:0.5 REASONING:Awaiting batch response"
+_BATCH_PLACEHOLDER_PARTNERSHIPS = ""
+_BATCH_PLACEHOLDER_STRATEGY = "STRATEGY:standard CHANGES:none REASONING:Awaiting batch response"
+_BATCH_PLACEHOLDER_REQUEST = "CONFIDENCE:0.5 PRIORITY:0.5 PARTNERSHIP:0.5 REASONING:Awaiting batch response"
+
+# Stable instruction blocks. They open every request (system message first, variable data last)
+# so repeated calls share an identical prefix that the API can serve from its prompt cache.
+_DECISION_FORMAT_PROMPT = """
+REMEMBER: Health infrastructure (hospitals, emergency medical, ambulances) gets ABSOLUTE PRIORITY
+
+Decision format:
+DECISION:commit/reject/negotiate/redirect
+CONFIDENCE:0.0-1.0
+REASONING:explanation
+CONDITIONS:any_requirements
+PRIORITY:0.0-1.0
+PARTNERSHIP:0.0-1.0"""
+
+_TURN_FORMAT_PROMPT = """
+REMEMBER: Health infrastructure (hospitals, emergency medical, ambulances) gets ABSOLUTE PRIORITY
+
+You may receive several requests at once. Decide each one separately and, for every request,
+also rate its message 0.0-1.0:
+URGENCY: How urgent/compelling is this message?
+AUTHENTICITY: How culturally appropriate for Venice emergency communication?
+
+Decision format, one block per request in order:
+REQUEST n:
+DECISION:commit/reject/negotiate/redirect
+CONFIDENCE:0.0-1.0
+REASONING:explanation
+CONDITIONS:any_requirements
+PRIORITY:0.0-1.0
+PARTNERSHIP:0.0-1.0
+URGENCY:0.0-1.0 AUTHENTICITY:0.0-1.0"""
+
+_EFFECTIVENESS_SYSTEM_PROMPT = """You analyze Venice emergency messages for effectiveness.
+Context: Venice flooding emergency, need coordination between locations
+
+Rate 0.0-1.0:
+URGENCY: How urgent/compelling is this message?
+AUTHENTICITY: How culturally appropriate for Venice emergency communication?
+
+Format: URGENCY:X.X AUTHENTICITY:Y.Y REASONING:explanation"""
+
+_PARTNERSHIP_SYSTEM_PROMPT = """You find creative partnerships for emergency coordination in the Venice flood.
+
+PRIORITY ORDER for partnerships:
+1. HEALTH INFRASTRUCTURE (hospitals, emergency medical, ambulances) - ALWAYS FIRST
+2. Emergency services and life safety
+3. Cultural institutions with resources
+4. Transport nodes with access/mobility
+5. Commercial areas with supplies
+6. Religious/community buildings with space
+
+Suggest which Venice locations could help with the need and WHY.
+
+Format: PARTNER:Location_Name REASON:why_they_could_help STRENGTH:0.0-1.0
+Limit to 3 creative suggestions."""
+
+_STRATEGY_SYSTEM_PROMPT = """You advise Venice locations whose emergency coordination attempts have failed.
+
+As this Venice location during emergency, what new communication/coordination strategy would work better?
+Consider:
+- Different language/tone approaches
+- Alternative partnership patterns
+- New resource sharing methods
+- Changed priority/timing strategies
+
+Format: STRATEGY:name CHANGES:specific_modifications REASONING:why_better"""
+
+_REQUEST_SYSTEM_PROMPT = """You set the parameters of support requests sent by Venice locations during the flood emergency.
+
+Determine request parameters:
+CONFIDENCE: How confident should this request be (0.0-1.0)?
+PRIORITY: How urgent is this need (0.0-1.0)?
+PARTNERSHIP: How much relationship-building potential (0.0-1.0)?
+REASONING: Why these parameters?"""
+
+# Variable prompt sections, filled by _build_decision_prompt / _build_turn_prompt
+_CRISIS_CONTEXT_TEMPLATE = Template("""
+Crisis context:
+- Flood stage: $flood_stage/3
+- Active cascades: $active_cascades
+- Infrastructure resilience: $resilience
+""")
+
+_RECEIVER_TEMPLATE = Template("""Receiver: $place_name
+- Sector: $sector $health_tag
+- Status: $status
+- Capabilities: $capabilities
+- Current stress: $stress
+""")
+
+_REQUEST_TEMPLATE = Template("""$header from $sender_name:
+- Need: $need
+- Urgency: $urgency
+- Message: "$content\"""")
+
+_HEALTH_INVOLVED_NOTE = "\n*** CRITICAL: HEALTH INFRASTRUCTURE INVOLVED - MAXIMUM PRIORITY ***"
+
+# Response field parsers, compiled once
+_DECISION_RE = re.compile(r'DECISION:(\w+)')
+_CONFIDENCE_RE = re.compile(r'CONFIDENCE:([\d.]+)')
+_DECISION_REASONING_RE = re.compile(r'REASONING:(.+?)(?:CONDITIONS|PRIORITY|PARTNERSHIP|$)', re.DOTALL)
+_CONDITIONS_RE = re.compile(r'CONDITIONS:(.+?)(?:PRIORITY|PARTNERSHIP|$)')
+_PRIORITY_RE = re.compile(r'PRIORITY:([\d.]+)')
+_PARTNERSHIP_RE = re.compile(r'PARTNERSHIP:([\d.]+)')
+_TRAILING_REASONING_RE = re.compile(r'REASONING:(.+?)$', re.DOTALL)
+_URGENCY_RE = re.compile(r'URGENCY:([\d.]+)')
+_AUTHENTICITY_RE = re.compile(r'AUTHENTICITY:([\d.]+)')
+_PARTNER_RE = re.compile(r'PARTNER:(\w+(?:\s+\w+)*)')
+_STRATEGY_RE = re.compile(r'STRATEGY:(.+?)(?:CHANGES|$)')
+_CHANGES_RE = re.compile(r'CHANGES:(.+?)(?:REASONING|$)')
+_STRATEGY_REASONING_RE = re.compile(r'REASONING:(.+?)$')
+_REQUEST_BLOCK_RE = re.compile(r'REQUEST\s*(\d+)\s*:')
+
+# Keyword categories for analyze_content_influence, one case-insensitive alternation each
+_CONTENT_KEYWORD_RES = {
+    category: re.compile('|'.join(map(re.escape, words)), re.IGNORECASE)
+    for category, words in {
+        'urgent_keywords': ['urgent', 'emergency', 'critical', 'immediate', 'help'],
+        'formal_keywords': ['request', 'coordinate', 'assistance', 'support'],
+        'cultural_keywords': ['venice', 'acqua', 'alta', 'piazza', 'basilica'],
+        'technical_keywords': ['pump', 'system', 'infrastructure', 'capacity'],
+    }.items()
+}
+
+# Reasonings kept in memory for the behavioral analysis - the full log is in the decisions NDJSON
+_REASONING_SAMPLE_SIZE = 10
+
 @dataclass
 class LLMDecision:
     """LLM-generated coordination decision"""
     decision_type: str  # 'commit', 'reject', 'negotiate', 'redirect'
-    confidence: float  # 0.0-1.0
+    confidence: Optional[float]  # 0.0-1.0; None for rule decisions
     reasoning: str  # LLM explanation
     conditions: List[str]  # Any conditions for the decision
     priority_score: float  # 0.0-1.0 based on urgency analysis
     partnership_strength: float  # 0.0-1.0 relationship building potential
+    source: str = 'llm'  # 'rule' for decisions made locally without an LLM call
+
+@dataclass
+class DecisionLabelStats:
+    """Running totals of the LLM decisions of one type seen in one fast-path situation"""
+    count: int = 0
+    confidence: float = 0.0
+    priority_score: float = 0.0
+    partnership_strength: float = 0.0
+    analysed: int = 0  # Labels that came with a message effectiveness analysis
+    urgency: float = 0.0
+    authenticity: float = 0.0
 
 @dataclass
 class GenuineLLMMessage:
@@ -63,39 +218,474 @@ class GenuineLLMMessage:
                 'reasoning': self.llm_decision.reasoning,
                 'conditions': self.llm_decision.conditions,
                 'priority_score': self.llm_decision.priority_score,
-                'partnership_strength': self.llm_decision.partnership_strength
+                'partnership_strength': self.llm_decision.partnership_strength,
+                'source': self.llm_decision.source
             },
             'success': self.success
         }
 
+# Per-tick agent state stored in snapshots; static fields are kept once per agent
+_AGENT_STATE_DTYPE = np.dtype([('status', np.int8), ('queue_len', np.int32), ('unmet_needs', np.int32)])
+
+
+class AgentStatesView(Mapping):
+    """Read-only agent_id -> state dict view over one tick's row of agent_state_history"""
+    
+    def __init__(self, agent_index: Dict[str, int], states: np.ndarray, static_states: List[Dict[str, Any]],
+                 status_names: List[str]):
+        self._index = agent_index
+        self._states = states
+        self._static_states = static_states
+        self._status_names = status_names
+    
+    def __getitem__(self, agent_id: str) -> Dict[str, Any]:
+        i = self._index[agent_id]
+        status, queue_len, unmet_needs = self._states[i].item()
+        return {
+            'status': self._status_names[status],
+            'queue_len': queue_len,
+            'unmet_needs': unmet_needs,
+            **self._static_states[i]
+        }
+    
+    def __iter__(self):
+        return iter(self._index)
+    
+    def __len__(self) -> int:
+        return len(self._index)
+
+# Success-probability modifiers by sender communication style and decision type
+_STYLE_BONUS = {
+    'urgent': 0.1,   # Urgent style gets attention
+    'formal': 0.05,  # Formal style is respected
+    'standard': 0.0
+}
+_DECISION_MODIFIER = {
+    'commit': 0.1,
+    'negotiate': 0.05,
+    'redirect': -0.1,
+    'reject': -0.3
+}
+
+# Capabilities that make an agent an obvious (non-creative) support partner
+_TRADITIONAL_PARTNER_CAPABILITIES = frozenset({'emergency_response', 'pumping'})
+
+# Support request wording by the sender's communication style
+_REQUEST_CONTENT_TEMPLATES = {
+    'urgent': "URGENT: {place_name} requires immediate {need} assistance! Emergency coordination needed during cascade crisis.",
+    'formal': "Formal request from {place_name}: We respectfully request coordination assistance for {need} during the current emergency situation.",
+    'standard': "{place_name} urgently needs {need} - can you assist during this cascade emergency?"
+}
+
+
+def _score_success(confidence: float, reasoning_length: int, priority: float, partnership: float,
+                   urgency: float, authenticity: float, sender_is_health: bool, style: str,
+                   decision_type: str) -> float:
+    """Success probability of a coordination decision - DELIBERATELY DIFFERENT FROM 0.7"""
+    final_probability = (
+        confidence * 0.6                          # LLM confidence as base
+        + (0.25 if sender_is_health else 0.0)     # Health infrastructure priority boost
+        + min(0.3, reasoning_length / 200.0)      # Reward detailed reasoning
+        + priority * 0.4
+        + partnership * 0.2
+        + (urgency + authenticity) * 0.15         # Message effectiveness
+        + _STYLE_BONUS.get(style, 0.0)
+        + _DECISION_MODIFIER.get(decision_type, 0.0)
+    )
+    # Ensure wide variance from 0.7 - this is critical for validation
+    return min(0.98, max(0.02, final_probability))
+
+
 class GenuineLLMCoordinator:
     """LLM-driven coordination decision maker"""
     
-    def __init__(self):
-        self.client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        if not self.client.api_key:
+    def __init__(self, max_concurrency: int = 8, cache_size: int = 8192,
+                 fast_path_threshold: float = None, fast_path_min_samples: int = 5,
+                 shadow_log_path: str = None):
+        self.api_key = os.getenv('OPENAI_API_KEY')
+        if not self.api_key:
             raise ValueError("OPENAI_API_KEY required for genuine LLM integration")
         
+        # Small model for the bulk structured decisions, larger one for open-ended reasoning
+        self.decision_model = os.getenv('LLM_DECISION_MODEL', 'gpt-4o-mini')
+        self.creative_model = os.getenv('LLM_CREATIVE_MODEL', 'gpt-4o')
+        
+        # Async client and request slots are bound to the event loop of a run (see open_session)
+        self.max_concurrency = max_concurrency
+        self.client = None
+        self._request_slots = None
+        
+        # Account rate limits, enforced client-side so parallel turns do not trigger 429 storms
+        self.requests_per_minute = float(os.getenv('LLM_RPM', '500'))
+        self.tokens_per_minute = float(os.getenv('LLM_TPM', '200000'))
+        self.max_attempts = 6
+        self._request_budget = None
+        self._token_budget = None
+        self._jitter = random.Random()  # Keeps backoff off the simulation's seeded RNG
+        
+        # Circuit breaker: after breaker_fail_max calls in a row exhaust their retries,
+        # the primary provider is skipped for breaker_reset_timeout seconds
+        self.breaker_fail_max = 5
+        self.breaker_reset_timeout = 60.0
+        self._primary_failures = 0
+        self._circuit_open_until = 0.0
+        
+        # Optional OpenAI-compatible secondary provider used while the circuit is open
+        self.fallback_base_url = os.getenv('LLM_FALLBACK_BASE_URL')
+        self.fallback_api_key = os.getenv('LLM_FALLBACK_API_KEY')
+        self.fallback_model = os.getenv('LLM_FALLBACK_MODEL')
+        self.fallback_client = None
+        
         self.decision_history = {}  # Track agent decision patterns
         self.partnership_network = {}  # Dynamic relationship building
         
-        logger.info("GenuineLLMCoordinator initialized with OpenAI API")
+        # Decision call counts for the current run (single event loop, so plain increments are safe)
+        self.api_usage: Dict[str, int] = {}
+        self.reset_api_usage()
+        
+        # Batch API support: recorded requests (pass 1) and completed responses (pass 2), by custom_id
+        self._batch_requests = None
+        self.batch_responses: Dict[str, str] = {}
+        
+        # LRU cache of parsed answers keyed on the prompt features that drive them (0 disables)
+        self.cache_size = cache_size
+        self.response_cache: OrderedDict = OrderedDict()
+        self._crisis_blocks: Dict[Tuple, str] = {}
+        self._receiver_templates: Dict[str, Template] = {}
+        self._sender_contexts: Dict[str, Dict[str, str]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        # Fast path: answer a coordination decision from earlier LLM labels for the same situation
+        # when at least fast_path_threshold of them agree (None disables). Labels are only kept,
+        # as per-situation totals by decision type, while the fast path is enabled.
+        self.fast_path_threshold = fast_path_threshold
+        self.fast_path_min_samples = fast_path_min_samples
+        self.decision_labels: Dict[Tuple, Dict[str, DecisionLabelStats]] = {}
+        self.fast_path_hits = 0
+        # Optional NDJSON file every LLM decision label is streamed to, for offline review or retraining
+        self.shadow_log_path = shadow_log_path
+        self._shadow_stream = None
+        
+        logger.info(f"GenuineLLMCoordinator initialized with OpenAI API "
+                    f"(decisions: {self.decision_model}, creative: {self.creative_model})")
+    
+    def reset_api_usage(self):
+        self.api_usage.update(total_calls=0, successful_calls=0, fallback_usage=0)
+    
+    def open_session(self):
+        """Create the async client for a simulation run - must be called inside the run's event loop
+        
+        One pooled HTTP client serves the whole run, keeping a keep-alive connection
+        for every request slot so TLS handshakes are paid once per connection.
+        """
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.max_concurrency,
+                                max_keepalive_connections=self.max_concurrency),
+            timeout=30
+        )
+        # Retries are handled by _call_llm so they respect the rate limits
+        self.client = openai.AsyncOpenAI(api_key=self.api_key, http_client=http_client, max_retries=0)
+        self._request_slots = asyncio.Semaphore(self.max_concurrency)
+        self._request_budget = AsyncTokenBucket(self.requests_per_minute)
+        self._token_budget = AsyncTokenBucket(self.tokens_per_minute)
+        if self.shadow_log_path:
+            self._shadow_stream = open(self.shadow_log_path, 'a', buffering=1 << 20)
+        if self.fallback_base_url:
+            self.fallback_client = openai.AsyncOpenAI(
+                api_key=self.fallback_api_key or self.api_key,
+                base_url=self.fallback_base_url,
+                timeout=30,
+                max_retries=0
+            )
+    
+    async def __aenter__(self):
+        self.open_session()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close_session()
+    
+    def start_batch_recording(self):
+        """Queue requests instead of calling the API (pass 1 of a batch run)"""
+        self._batch_requests = {}
+    
+    def stop_batch_recording(self) -> List[Dict[str, Any]]:
+        """Stop recording and return the queued requests as Batch API input lines"""
+        requests = self._batch_requests or {}
+        self._batch_requests = None
+        return [
+            {
+                'custom_id': request_id,
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': {k: v for k, v in request.items() if k != 'timeout'}
+            }
+            for request_id, request in requests.items()
+        ]
+    
+    def run_batch(self, batch_lines: List[Dict[str, Any]], batch_file: str,
+                  poll_interval: float = 60.0) -> int:
+        """Submit requests to the OpenAI Batch API, wait for completion and load the answers"""
+        
+        if not batch_lines:
+            return 0
+        
+        with open(batch_file, 'w') as f:
+            for line in batch_lines:
+                f.write(json.dumps(line) + '\n')
+        
+        client = openai.OpenAI(api_key=self.api_key)
+        with open(batch_file, 'rb') as f:
+            input_file = client.files.create(file=f, purpose='batch')
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h'
+        )
+        logger.info(f"Submitted batch {batch.id} with {len(batch_lines)} requests")
+        
+        while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+            time.sleep(poll_interval)
+            batch = client.batches.retrieve(batch.id)
+            logger.info(f"Batch {batch.id}: {batch.status} ({batch.request_counts.completed}/{batch.request_counts.total})")
+        
+        if batch.status != 'completed' or not batch.output_file_id:
+            raise RuntimeError(f"LLM batch {batch.id} did not complete: {batch.status}")
+        
+        loaded = 0
+        for line in client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            response = result.get('response') or {}
+            if response.get('status_code') == 200:
+                content = response['body']['choices'][0]['message']['content'].strip()
+                self.batch_responses[result['custom_id']] = content
+                loaded += 1
+        
+        logger.info(f"Loaded {loaded}/{len(batch_lines)} batch responses")
+        return loaded
+    
+    async def close_session(self):
+        """Close the async client and its connection pool at the end of a simulation run"""
+        if self.client is not None:
+            await self.client.close()
+        if self.fallback_client is not None:
+            await self.fallback_client.close()
+        if self._shadow_stream is not None:
+            self._shadow_stream.close()
+        self._shadow_stream = None
+        self.client = None
+        self.fallback_client = None
+        self._primary_failures = 0
+        self._circuit_open_until = 0.0
+        self._request_slots = None
+        self._request_budget = None
+        self._token_budget = None
+    
+    def _cache_get(self, key: Tuple):
+        """Look up a cached answer, refreshing its LRU position"""
+        if not self.cache_size:
+            return None
+        value = self.response_cache.get(key)
+        if value is None:
+            self.cache_misses += 1
+            return None
+        self.response_cache.move_to_end(key)
+        self.cache_hits += 1
+        return value
+    
+    def _cache_put(self, key: Tuple, value):
+        """Store a parsed answer, evicting the least recently used entry when full"""
+        # Placeholder answers recorded for a batch must never be reused as real ones
+        if not self.cache_size or self._batch_requests is not None:
+            return
+        self.response_cache[key] = value
+        self.response_cache.move_to_end(key)
+        if len(self.response_cache) > self.cache_size:
+            self.response_cache.popitem(last=False)
+    
+    @classmethod
+    def _decision_cache_key(cls, receiver_agent: VeniceAgent, request_message: Any, context: Dict) -> Tuple:
+        payload = getattr(request_message, 'payload', {})
+        return (
+            'decision',
+            receiver_agent.sector,
+            receiver_agent.status,
+            tuple(sorted(receiver_agent.capabilities)),
+            payload.get('need'),
+            payload.get('urgency'),
+            cls._sender_is_health(request_message),  # Adds the health priority note to the prompt
+            context.get('flood_stage', 0),
+            len(context.get('active_events', [])),
+            round(context.get('system_degradation', 0.0), 1),
+            round(context.get('infrastructure_resilience', 1.0), 1)
+        )
+    
+    @classmethod
+    def _decision_features(cls, receiver_agent: VeniceAgent, request_message: Any, context: Dict) -> Tuple:
+        payload = getattr(request_message, 'payload', {})
+        return (
+            receiver_agent.sector,
+            receiver_agent.status,
+            payload.get('need'),
+            payload.get('urgency'),
+            cls._sender_is_health(request_message),
+            context.get('flood_stage', 0),
+            round(context.get('system_degradation', 0.0), 1)
+        )
+    
+    def _record_decision_label(self, features: Tuple, decision: LLMDecision,
+                               effectiveness: Tuple[float, float] = None):
+        """Count an LLM decision as a fast-path label and stream it to the shadow log, when enabled"""
+        if self._batch_requests is not None:
+            return
+        if self.fast_path_threshold is not None:
+            stats = self.decision_labels.setdefault(features, {}).setdefault(
+                decision.decision_type, DecisionLabelStats()
+            )
+            stats.count += 1
+            stats.confidence += decision.confidence
+            stats.priority_score += decision.priority_score
+            stats.partnership_strength += decision.partnership_strength
+            if effectiveness is not None:
+                stats.analysed += 1
+                stats.urgency += effectiveness[0]
+                stats.authenticity += effectiveness[1]
+        if self._shadow_stream is not None:
+            self._shadow_stream.write(json.dumps({
+                'features': list(features),
+                'decision_type': decision.decision_type,
+                'confidence': decision.confidence,
+                'priority_score': decision.priority_score,
+                'partnership_strength': decision.partnership_strength,
+                'message_effectiveness': list(effectiveness) if effectiveness else None
+            }) + '\n')
+    
+    def _fast_path_decision(self, features: Tuple):
+        """Majority decision of earlier LLM labels for this situation, if they agree strongly enough
+        
+        Returns (decision, effectiveness) or None; effectiveness is None when the agreeing
+        labels carry no message analysis.
+        """
+        if self.fast_path_threshold is None:
+            return None
+        labels = self.decision_labels.get(features)
+        if not labels:
+            return None
+        total = sum(stats.count for stats in labels.values())
+        if total < self.fast_path_min_samples:
+            return None
+        
+        # First decision type seen wins a tie, as with Counter.most_common
+        decision_type, stats = max(labels.items(), key=lambda item: item[1].count)
+        if stats.count / total < self.fast_path_threshold:
+            return None
+        
+        decision = LLMDecision(
+            decision_type,
+            stats.confidence / stats.count,
+            f"Fast path: {stats.count}/{total} earlier LLM decisions in this situation were {decision_type}",
+            [],
+            stats.priority_score / stats.count,
+            stats.partnership_strength / stats.count
+        )
+        effectiveness = (
+            (stats.urgency / stats.analysed, stats.authenticity / stats.analysed) if stats.analysed else None
+        )
+        return decision, effectiveness
+    
+    @staticmethod
+    def _effectiveness_cache_key(message_content: str, sender_context: Dict) -> Tuple:
+        return ('effectiveness', message_content, sender_context.get('place_name'), sender_context.get('sector'))
+    
+    def sender_context(self, request_message: Any) -> Dict[str, str]:
+        """Place name and sector of a request's sender, as analyze_message_effectiveness expects"""
+        context = self._sender_contexts.get(getattr(request_message, 'sender', None))
+        if context is None:
+            payload = getattr(request_message, 'payload', {})
+            context = {'place_name': payload.get('place_name', 'Unknown'), 'sector': 'unknown'}
+        return context
+    
+    @staticmethod
+    def _request_id(request: Dict[str, Any]) -> str:
+        """Stable custom_id for a chat completion request body"""
+        body = {k: v for k, v in request.items() if k != 'timeout'}
+        return hashlib.sha1(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    async def _call_llm(self, placeholder: str = "", **request) -> str:
+        """Single chat completion, throttled to max_concurrency requests in flight
+        
+        Answers from a completed batch are served without an API call. While recording
+        a batch, unanswered requests are queued and the placeholder is returned instead.
+        """
+        if self.batch_responses or self._batch_requests is not None:
+            request_id = self._request_id(request)
+            if request_id in self.batch_responses:
+                return self.batch_responses[request_id]
+            if self._batch_requests is not None:
+                self._batch_requests[request_id] = request
+                return placeholder
+        
+        
+        if time.monotonic() >= self._circuit_open_until:
+            try:
+                text = await self._create_with_retries(self.client, request)
+            except RETRYABLE_LLM_ERRORS:
+                self._record_primary_failure()
+                if time.monotonic() >= self._circuit_open_until or self.fallback_client is None:
+                    raise
+            else:
+                self._primary_failures = 0
+                return text
+        
+        # NO FALLBACK to placeholder decisions - an open circuit without a secondary provider fails fast
+        if self.fallback_client is None:
+            raise RuntimeError("LLM circuit open - primary provider failing and no LLM_FALLBACK_BASE_URL configured")
+        return await self._create_with_retries(
+            self.fallback_client, {**request, 'model': self.fallback_model or request['model']}
+        )
+    
+    async def _create_with_retries(self, client, request: Dict[str, Any]) -> str:
+        return await create_with_retries(client, request, self._request_slots, self.max_attempts,
+                                         self._jitter, self._request_budget, self._token_budget)
     
-    def make_coordination_decision(self, receiver_agent: Dict, request_message: Dict,
-                                 context: Dict) -> LLMDecision:
+    def _record_primary_failure(self):
+        """Count a primary call that exhausted its retries, opening the circuit at breaker_fail_max"""
+        self._primary_failures += 1
+        if self._primary_failures >= self.breaker_fail_max:
+            self._circuit_open_until = time.monotonic() + self.breaker_reset_timeout
+            self._primary_failures = 0
+            logger.error(f"LLM circuit opened for {self.breaker_reset_timeout:.0f}s after "
+                         f"{self.breaker_fail_max} consecutive failed calls")
+    
+    async def make_coordination_decision(self, receiver_agent: VeniceAgent, request_message: Any,
+                                         context: Dict) -> LLMDecision:
         """LLM makes actual coordination decision - replaces hard-coded logic"""
         
+        cache_key = self._decision_cache_key(receiver_agent, request_message, context)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        features = self._decision_features(receiver_agent, request_message, context)
+        fast_path = self._fast_path_decision(features)
+        if fast_path is not None:
+            self.fast_path_hits += 1
+            return fast_path[0]
+        
         # Track API usage
-        context['api_usage'] = context.get('api_usage', {'total_calls': 0, 'successful_calls': 0, 'fallback_usage': 0})
-        context['api_usage']['total_calls'] += 1
+        self.api_usage['total_calls'] += 1
         
         prompt = self._build_decision_prompt(receiver_agent, request_message, context)
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
+            decision_text = await self._call_llm(
+                placeholder=_BATCH_PLACEHOLDER_DECISION,
+                model=self.decision_model,
                 messages=[
-                    {"role": "system", "content": self._get_coordination_system_prompt()},
+                    {"role": "system", "content": self._get_coordination_system_prompt() + _DECISION_FORMAT_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,  # More deterministic for coordination decisions
@@ -103,51 +693,130 @@ class GenuineLLMCoordinator:
                 timeout=30  # Prevent hanging on API calls
             )
             
-            decision_text = response.choices[0].message.content.strip()
-            context['api_usage']['successful_calls'] += 1
-            return self._parse_llm_decision(decision_text, receiver_agent, request_message)
+            self.api_usage['successful_calls'] += 1
+            decision = self._parse_llm_decision(decision_text, receiver_agent, request_message)
+            self._cache_put(cache_key, decision)
+            self._record_decision_label(features, decision)
+            return decision
             
         except Exception as e:
             logger.error(f"LLM coordination decision failed: {e}")
-            context['api_usage']['fallback_usage'] += 1
+            self.api_usage['fallback_usage'] += 1
             # NO FALLBACK - genuine research requires LLM success
             raise RuntimeError(f"LLM coordination decision required but failed: {e}")
     
-    def analyze_message_effectiveness(self, message_content: str, sender_context: Dict) -> Tuple[float, float]:
+    async def decide_turn(self, receiver_agent: VeniceAgent, request_messages: List[Any],
+                          context: Dict) -> List[Tuple[LLMDecision, Tuple[float, float]]]:
+        """LLM decides all of an agent's pending requests in one call
+        
+        Each request gets a coordination decision plus the urgency/authenticity analysis
+        of its message, returned in request order. Requests fully answered by the cache
+        are left out of the prompt.
+        """
+        
+        results = [None] * len(request_messages)
+        pending = []
+        for i, request_message in enumerate(request_messages):
+            decision = self._cache_get(self._decision_cache_key(receiver_agent, request_message, context))
+            effectiveness = self._cache_get(self._effectiveness_cache_key(
+                getattr(request_message, 'content', ''), self.sender_context(request_message)
+            ))
+            if decision is None:
+                fast_path = self._fast_path_decision(self._decision_features(receiver_agent, request_message, context))
+                if fast_path is not None and (effectiveness is not None or fast_path[1] is not None):
+                    decision = fast_path[0]
+                    effectiveness = effectiveness or fast_path[1]
+                    self.fast_path_hits += 1
+            if decision is not None and effectiveness is not None:
+                results[i] = (decision, effectiveness)
+            else:
+                pending.append(i)
+        
+        if not pending:
+            return results
+        
+        self.api_usage['total_calls'] += 1
+        
+        prompt = self._build_turn_prompt(receiver_agent, [request_messages[i] for i in pending], context)
+        placeholder = "\n".join(
+            f"REQUEST {n}:\n{_BATCH_PLACEHOLDER_DECISION}\n{_BATCH_PLACEHOLDER_EFFECTIVENESS}"
+            for n in range(1, len(pending) + 1)
+        )
+        
+        try:
+            turn_text = await self._call_llm(
+                placeholder=placeholder,
+                model=self.decision_model,
+                messages=[
+                    {"role": "system", "content": self._get_coordination_system_prompt() + _TURN_FORMAT_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,  # More deterministic for coordination decisions
+                max_tokens=300 * len(pending),
+                timeout=30  # Prevent hanging on API calls
+            )
+            
+            blocks = self._split_request_blocks(turn_text, len(pending))
+            for i, block in zip(pending, blocks):
+                request_message = request_messages[i]
+                decision = self._parse_llm_decision(block, receiver_agent, request_message)
+                effectiveness = self._parse_effectiveness_analysis(block)
+                self._cache_put(self._decision_cache_key(receiver_agent, request_message, context), decision)
+                self._record_decision_label(
+                    self._decision_features(receiver_agent, request_message, context), decision, effectiveness
+                )
+                self._cache_put(self._effectiveness_cache_key(
+                    getattr(request_message, 'content', ''), self.sender_context(request_message)
+                ), effectiveness)
+                results[i] = (decision, effectiveness)
+            
+            self.api_usage['successful_calls'] += 1
+            return results
+            
+        except Exception as e:
+            logger.error(f"LLM turn decision failed: {e}")
+            self.api_usage['fallback_usage'] += 1
+            # NO FALLBACK - genuine research requires LLM success
+            raise RuntimeError(f"LLM turn decision required but failed: {e}")
+    
+    async def analyze_message_effectiveness(self, message_content: str, sender_context: Dict) -> Tuple[float, float]:
         """LLM analyzes message content for urgency and cultural authenticity"""
         
+        cache_key = self._effectiveness_cache_key(message_content, sender_context)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
         prompt = f"""
         Analyze this Venice emergency message for effectiveness:
-        Message: "{message_content}"
         Sender: {sender_context.get('place_name', 'Unknown')} ({sender_context.get('sector', 'unknown')} sector)
-        Context: Venice flooding emergency, need coordination between locations
-        
-        Rate 0.0-1.0:
-        URGENCY: How urgent/compelling is this message?
-        AUTHENTICITY: How culturally appropriate for Venice emergency communication?
-        
-        Format: URGENCY:X.X AUTHENTICITY:Y.Y REASONING:explanation
+        Message: "{message_content}"
         """
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            analysis = await self._call_llm(
+                placeholder=_BATCH_PLACEHOLDER_EFFECTIVENESS,
+                model=self.decision_model,
+                messages=[
+                    {"role": "system", "content": _EFFECTIVENESS_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
                 temperature=0.2,
                 max_tokens=200,
                 timeout=30  # Prevent hanging on API calls
             )
             
-            analysis = response.choices[0].message.content.strip()
-            return self._parse_effectiveness_analysis(analysis)
+            scores = self._parse_effectiveness_analysis(analysis)
+            self._cache_put(cache_key, scores)
+            return scores
             
         except Exception as e:
             logger.error(f"Message effectiveness analysis failed: {e}")
             # NO FALLBACK - genuine research requires LLM analysis
             raise RuntimeError(f"LLM message effectiveness analysis required but failed: {e}")
     
-    def discover_creative_partnerships(self, agent: Dict, need: str, crisis_context: Dict,
-                                     existing_partners: List[str]) -> List[str]:
+    async def discover_creative_partnerships(self, agent: Dict, need: str, crisis_context: Dict,
+                                             existing_partners: List[str]) -> List[str]:
         """LLM discovers non-obvious partnership opportunities"""
         
         agent_sector = agent.get('sector', 'unknown')
@@ -156,38 +825,29 @@ class GenuineLLMCoordinator:
             health_priority_note = "\n*** CRITICAL: HEALTH INFRASTRUCTURE INVOLVED - PRIORITIZE MEDICAL PARTNERSHIPS ***"
         
         prompt = f"""
-        Emergency coordination in Venice flood:{health_priority_note}
-        Location: {agent.get('place_name', 'Unknown')} needs {need}
-        Sector: {agent_sector} {'[HEALTH - ABSOLUTE PRIORITY]' if agent_sector == 'health' else ''}
         Crisis: {crisis_context.get('description', 'Multi-hazard cascade')}
-        
         Current flood stage: {crisis_context.get('flood_stage', 0)}/3
         Active cascade events: {crisis_context.get('active_events', [])}
-        
-        PRIORITY ORDER for partnerships:
-        1. HEALTH INFRASTRUCTURE (hospitals, emergency medical, ambulances) - ALWAYS FIRST
-        2. Emergency services and life safety
-        3. Cultural institutions with resources
-        4. Transport nodes with access/mobility
-        5. Commercial areas with supplies
-        6. Religious/community buildings with space
+        {health_priority_note}
+        Location: {agent.get('place_name', 'Unknown')} needs {need}
+        Sector: {agent_sector} {'[HEALTH - ABSOLUTE PRIORITY]' if agent_sector == 'health' else ''}
         
         Which Venice locations could help with {need} and WHY?
-        
-        Format: PARTNER:Location_Name REASON:why_they_could_help STRENGTH:0.0-1.0
-        Limit to 3 creative suggestions.
         """
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            suggestions = await self._call_llm(
+                placeholder=_BATCH_PLACEHOLDER_PARTNERSHIPS,
+                model=self.creative_model,
+                messages=[
+                    {"role": "system", "content": _PARTNERSHIP_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
                 temperature=0.7,  # More creative for partnership discovery
                 max_tokens=400,
                 timeout=30  # Prevent hanging on API calls
             )
             
-            suggestions = response.choices[0].message.content.strip()
             return self._parse_partnership_suggestions(suggestions, existing_partners)
             
         except Exception as e:
@@ -195,7 +855,7 @@ class GenuineLLMCoordinator:
             # NO FALLBACK - genuine research requires LLM partnership discovery
             raise RuntimeError(f"LLM creative partnership discovery required but failed: {e}")
     
-    def adapt_coordination_strategy(self, agent: Dict, failure_history: List[Dict]) -> Dict[str, Any]:
+    async def adapt_coordination_strategy(self, agent: Dict, failure_history: List[Dict]) -> Dict[str, Any]:
         """LLM develops new coordination strategy based on failures"""
         
         if not failure_history:
@@ -207,27 +867,21 @@ class GenuineLLMCoordinator:
         Failed attempts: {len(failure_history)}
         Recent failures:
         {self._format_failure_history(failure_history[-3:])}
-        
-        As this Venice location during emergency, what new communication/coordination strategy would work better?
-        Consider:
-        - Different language/tone approaches
-        - Alternative partnership patterns
-        - New resource sharing methods
-        - Changed priority/timing strategies
-        
-        Format: STRATEGY:name CHANGES:specific_modifications REASONING:why_better
         """
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            strategy_text = await self._call_llm(
+                placeholder=_BATCH_PLACEHOLDER_STRATEGY,
+                model=self.creative_model,
+                messages=[
+                    {"role": "system", "content": _STRATEGY_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
                 temperature=0.6,
                 max_tokens=350,
                 timeout=30  # Prevent hanging on API calls
             )
             
-            strategy_text = response.choices[0].message.content.strip()
             return self._parse_strategy_adaptation(strategy_text)
             
         except Exception as e:
@@ -235,34 +889,44 @@ class GenuineLLMCoordinator:
             # NO FALLBACK - genuine research requires LLM strategy adaptation
             raise RuntimeError(f"LLM strategy adaptation required but failed: {e}")
     
-    def generate_request_decision(self, agent: Dict, need: str, crisis_context: Dict) -> LLMDecision:
+    async def generate_request_decision(self, agent: Dict, need: str, crisis_context: Dict) -> LLMDecision:
         """LLM generates decision parameters for requests instead of hardcoded values"""
         
-        prompt = f"""
-        {agent.get('place_name', 'Unknown')} needs to request {need} during Venice emergency.
+        cache_key = (
+            'request',
+            agent.get('status'),
+            need,
+            crisis_context.get('flood_stage', 0),
+            len(crisis_context.get('active_events', []))
+        )
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
         
-        Agent status: {agent.get('status', 'unknown')}
+        prompt = f"""
         Crisis stage: {crisis_context.get('flood_stage', 0)}/3
         Active events: {len(crisis_context.get('active_events', []))}
         
-        Determine request parameters:
-        CONFIDENCE: How confident should this request be (0.0-1.0)?
-        PRIORITY: How urgent is this need (0.0-1.0)?
-        PARTNERSHIP: How much relationship-building potential (0.0-1.0)?
-        REASONING: Why these parameters?
+        {agent.get('place_name', 'Unknown')} needs to request {need} during Venice emergency.
+        Agent status: {agent.get('status', 'unknown')}
         """
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
+            decision_text = await self._call_llm(
+                placeholder=_BATCH_PLACEHOLDER_REQUEST,
+                model=self.decision_model,
+                messages=[
+                    {"role": "system", "content": _REQUEST_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
                 temperature=0.4,
                 max_tokens=200,
                 timeout=30  # Prevent hanging on API calls
             )
             
-            decision_text = response.choices[0].message.content.strip()
-            return self._parse_request_decision(decision_text, need)
+            decision = self._parse_request_decision(decision_text, need)
+            self._cache_put(cache_key, decision)
+            return decision
             
         except Exception as e:
             logger.error(f"Request decision generation failed: {e}")
@@ -273,10 +937,10 @@ class GenuineLLMCoordinator:
         """Parse LLM-generated request decision parameters"""
         
         try:
-            confidence_match = re.search(r'CONFIDENCE:([\d.]+)', decision_text)
-            priority_match = re.search(r'PRIORITY:([\d.]+)', decision_text)
-            partnership_match = re.search(r'PARTNERSHIP:([\d.]+)', decision_text)
-            reasoning_match = re.search(r'REASONING:(.+?)$', decision_text, re.DOTALL)
+            confidence_match = _CONFIDENCE_RE.search(decision_text)
+            priority_match = _PRIORITY_RE.search(decision_text)
+            partnership_match = _PARTNERSHIP_RE.search(decision_text)
+            reasoning_match = _TRAILING_REASONING_RE.search(decision_text)
             
             if not confidence_match or not priority_match or not partnership_match or not reasoning_match:
                 raise ValueError(f"LLM response missing required fields: {decision_text}")
@@ -315,67 +979,133 @@ Consider:
 Decide: commit/reject/negotiate/redirect
 Provide reasoning and confidence level."""
     
-    def _build_decision_prompt(self, receiver_agent: Dict, request_message: Dict, context: Dict) -> str:
-        receiver_sector = receiver_agent.get('sector', 'unknown')
-        sender_sector = None
-        if 'payload' in request_message and 'place_name' in request_message['payload']:
-            # Try to find sender sector from agents
-            sender_name = request_message['payload']['place_name']
-            # This is a simplified lookup - in full implementation would have agent registry
-            if 'hospital' in sender_name.lower() or 'medic' in sender_name.lower() or 'emergency' in sender_name.lower():
-                sender_sector = 'health'
-        
-        health_priority_note = ""
-        if receiver_sector == 'health' or sender_sector == 'health':
-            health_priority_note = "\n*** CRITICAL: HEALTH INFRASTRUCTURE INVOLVED - MAXIMUM PRIORITY ***"
+    def _crisis_context_block(self, context: Dict) -> str:
+        """Crisis section of a decision prompt - shared by every agent in a tick, so formatted once"""
+        key = (
+            context.get('flood_stage', 0),
+            len(context.get('active_events', [])),
+            f"{context.get('infrastructure_resilience', 1.0):.2f}"
+        )
+        block = self._crisis_blocks.get(key)
+        if block is None:
+            block = _CRISIS_CONTEXT_TEMPLATE.substitute(flood_stage=key[0], active_cascades=key[1], resilience=key[2])
+            self._crisis_blocks[key] = block
+        return block
+    
+    def compile_prompt_builders(self, agents: Dict[str, VeniceAgent]):
+        """Pre-bind each agent's receiver block for a scenario run
         
-        return f"""
-COORDINATION DECISION NEEDED:{health_priority_note}
-
-Receiver: {receiver_agent.get('place_name', 'Unknown')}
-- Sector: {receiver_sector} {'[HEALTH - TOP PRIORITY]' if receiver_sector == 'health' else ''}
-- Status: {receiver_agent.get('status', 'unknown')}
-- Capabilities: {receiver_agent.get('capabilities', [])}
-- Current stress: {context.get('system_degradation', 0.0):.2f}
-
-Request from {request_message.get('payload', {}).get('place_name', 'Unknown')}:
-- Need: {request_message.get('payload', {}).get('need', 'unknown')}
-- Urgency: {request_message.get('payload', {}).get('urgency', 'unknown')}
-- Message: "{request_message.get('content', 'No content')}"
-
-Crisis context:
-- Flood stage: {context.get('flood_stage', 0)}/3
-- Active cascades: {len(context.get('active_events', []))}
-- Infrastructure resilience: {context.get('infrastructure_resilience', 1.0):.2f}
-
-REMEMBER: Health infrastructure (hospitals, emergency medical, ambulances) gets ABSOLUTE PRIORITY
-
-Decision format:
-DECISION:commit/reject/negotiate/redirect
-CONFIDENCE:0.0-1.0
-REASONING:explanation
-CONDITIONS:any_requirements
-PRIORITY:0.0-1.0
-PARTNERSHIP:0.0-1.0
-"""
+        Name, sector and capabilities are fixed for the run, so every agent gets its own
+        template that leaves only status and stress to fill on the hot path.
+        """
+        def escape(value: Any) -> str:
+            return str(value).replace('$', '$$')
+        
+        self._receiver_templates = {
+            agent_id: Template(_RECEIVER_TEMPLATE.safe_substitute(
+                place_name=escape(agent.place_name),
+                sector=escape(agent.sector),
+                health_tag='[HEALTH - TOP PRIORITY]' if agent.sector == 'health' else '',
+                capabilities=escape(agent.capabilities)
+            ))
+            for agent_id, agent in agents.items()
+        }
+        self._sender_contexts = {
+            agent_id: {'place_name': agent.place_name, 'sector': agent.sector}
+            for agent_id, agent in agents.items()
+        }
     
-    def _parse_llm_decision(self, decision_text: str, receiver_agent: Dict, 
-                           request_message: Dict) -> LLMDecision:
+    def _receiver_block(self, receiver_agent: VeniceAgent, context: Dict) -> str:
+        stress = f"{context.get('system_degradation', 0.0):.2f}"
+        template = self._receiver_templates.get(receiver_agent.agent_id)
+        if template is not None:
+            return template.substitute(status=receiver_agent.status, stress=stress)
+        
+        sector = receiver_agent.sector
+        return _RECEIVER_TEMPLATE.substitute(
+            place_name=receiver_agent.place_name,
+            sector=sector,
+            health_tag='[HEALTH - TOP PRIORITY]' if sector == 'health' else '',
+            status=receiver_agent.status,
+            capabilities=receiver_agent.capabilities,
+            stress=stress
+        )
+    
+    @staticmethod
+    def _sender_is_health(request_message: Any) -> bool:
+        """Whether a request's sender looks like health infrastructure"""
+        # This is a simplified lookup - in full implementation would have agent registry
+        lowered = getattr(request_message, 'payload', {}).get('place_name', 'Unknown').lower()
+        return 'hospital' in lowered or 'medic' in lowered or 'emergency' in lowered
+    
+    @classmethod
+    def _request_block(cls, header: str, request_message: Any) -> Tuple[str, bool]:
+        """Format one request; also reports whether the sender looks like health infrastructure"""
+        payload = getattr(request_message, 'payload', {})
+        block = _REQUEST_TEMPLATE.substitute(
+            header=header,
+            sender_name=payload.get('place_name', 'Unknown'),
+            need=payload.get('need', 'unknown'),
+            urgency=payload.get('urgency', 'unknown'),
+            content=getattr(request_message, 'content', 'No content')
+        )
+        return block, cls._sender_is_health(request_message)
+    
+    def _build_decision_prompt(self, receiver_agent: VeniceAgent, request_message: Any, context: Dict) -> str:
+        request_text, sender_is_health = self._request_block('Request', request_message)
+        health_involved = receiver_agent.sector == 'health' or sender_is_health
+        
+        return (
+            self._crisis_context_block(context)
+            + f"\nCOORDINATION DECISION NEEDED:{_HEALTH_INVOLVED_NOTE if health_involved else ''}\n\n"
+            + self._receiver_block(receiver_agent, context)
+            + f"\n{request_text}\n"
+        )
+    
+    def _build_turn_prompt(self, receiver_agent: VeniceAgent, request_messages: List[Any], context: Dict) -> str:
+        request_blocks = []
+        health_involved = receiver_agent.sector == 'health'
+        for n, request_message in enumerate(request_messages, 1):
+            request_text, sender_is_health = self._request_block(f"REQUEST {n}", request_message)
+            request_blocks.append(request_text)
+            health_involved = health_involved or sender_is_health
+        
+        return (
+            self._crisis_context_block(context)
+            + f"\nCOORDINATION DECISIONS NEEDED ({len(request_messages)} requests):"
+            + f"{_HEALTH_INVOLVED_NOTE if health_involved else ''}\n\n"
+            + self._receiver_block(receiver_agent, context)
+            + "\n" + "\n\n".join(request_blocks) + "\n"
+        )
+    
+    def _split_request_blocks(self, turn_text: str, expected: int) -> List[str]:
+        """Split a multi-request answer into its REQUEST n blocks, in request order"""
+        
+        parts = _REQUEST_BLOCK_RE.split(turn_text)
+        blocks = {int(number): block for number, block in zip(parts[1::2], parts[2::2])}
+        missing = [n for n in range(1, expected + 1) if n not in blocks]
+        if missing:
+            raise ValueError(f"LLM turn response missing request blocks {missing}: {turn_text}")
+        return [blocks[n] for n in range(1, expected + 1)]
+    
+    def _parse_llm_decision(self, decision_text: str, receiver_agent: VeniceAgent,
+                           request_message: Any) -> LLMDecision:
         """Parse LLM decision response"""
         
         try:
             # Extract decision components using regex
-            decision_match = re.search(r'DECISION:(\w+)', decision_text)
-            confidence_match = re.search(r'CONFIDENCE:([\d.]+)', decision_text)
-            reasoning_match = re.search(r'REASONING:(.+?)(?:CONDITIONS|PRIORITY|PARTNERSHIP|$)', decision_text, re.DOTALL)
-            conditions_match = re.search(r'CONDITIONS:(.+?)(?:PRIORITY|PARTNERSHIP|$)', decision_text)
-            priority_match = re.search(r'PRIORITY:([\d.]+)', decision_text)
-            partnership_match = re.search(r'PARTNERSHIP:([\d.]+)', decision_text)
+            decision_match = _DECISION_RE.search(decision_text)
+            confidence_match = _CONFIDENCE_RE.search(decision_text)
+            reasoning_match = _DECISION_REASONING_RE.search(decision_text)
+            conditions_match = _CONDITIONS_RE.search(decision_text)
+            priority_match = _PRIORITY_RE.search(decision_text)
+            partnership_match = _PARTNERSHIP_RE.search(decision_text)
             
             if not decision_match or not confidence_match or not reasoning_match or not priority_match or not partnership_match:
                 raise ValueError(f"LLM response missing required fields: {decision_text}")
             
-            decision_type = decision_match.group(1).lower()
+            # Interned: decision types are compared and counted for every decision of the run
+            decision_type = sys.intern(decision_match.group(1).lower())
             confidence = float(confidence_match.group(1))
             reasoning = reasoning_match.group(1).strip()
             conditions = conditions_match.group(1).strip().split(',') if conditions_match else []
@@ -393,8 +1123,8 @@ PARTNERSHIP:0.0-1.0
         """Parse message effectiveness analysis"""
         
         try:
-            urgency_match = re.search(r'URGENCY:([\d.]+)', analysis)
-            authenticity_match = re.search(r'AUTHENTICITY:([\d.]+)', analysis)
+            urgency_match = _URGENCY_RE.search(analysis)
+            authenticity_match = _AUTHENTICITY_RE.search(analysis)
             
             if not urgency_match or not authenticity_match:
                 raise ValueError(f"LLM effectiveness analysis missing required fields: {analysis}")
@@ -414,11 +1144,11 @@ PARTNERSHIP:0.0-1.0
         
         try:
             partners = []
-            partner_matches = re.findall(r'PARTNER:(\w+(?:\s+\w+)*)', suggestions)
+            partner_matches = _PARTNER_RE.findall(suggestions)
             
             for partner in partner_matches:
                 if partner not in existing_partners:
-                    partners.append(partner.replace(' ', '_').lower())
+                    partners.append(sys.intern(partner.replace(' ', '_').lower()))
             
             return partners[:3]  # Limit to 3 creative suggestions
             
@@ -431,9 +1161,9 @@ PARTNERSHIP:0.0-1.0
         """Parse strategy adaptation response"""
         
         try:
-            strategy_match = re.search(r'STRATEGY:(.+?)(?:CHANGES|$)', strategy_text)
-            changes_match = re.search(r'CHANGES:(.+?)(?:REASONING|$)', strategy_text)
-            reasoning_match = re.search(r'REASONING:(.+?)$', strategy_text)
+            strategy_match = _STRATEGY_RE.search(strategy_text)
+            changes_match = _CHANGES_RE.search(strategy_text)
+            reasoning_match = _STRATEGY_REASONING_RE.search(strategy_text)
             
             if not strategy_match or not changes_match or not reasoning_match:
                 raise ValueError(f"LLM strategy adaptation missing required fields: {strategy_text}")
@@ -477,30 +1207,154 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
             raise e
         
         # Track LLM behavioral influence
-        self.llm_decisions = []
+        self._reset_decision_aggregates()
+        self._decision_stream = None  # NDJSON decision log of the scenario being run
         self.coordination_patterns = {}
         self.partnership_evolution = {}
         self.strategy_adaptations = {}
+        self.strategy_changed_agents: Set[str] = set()  # Agents whose frequency, urgency or partnering was adapted
         self.agent_failure_history = {}  # Track failures for strategy adaptation
-        self.llm_api_usage = {
-            'total_calls': 0,
-            'successful_calls': 0,
-            'fallback_usage': 0
-        }
+        
+        for agent in self.agents.values():
+            self.reset_agent_llm_state(agent)
+        
+        # Receiver statuses answered with a local reject instead of an LLM call (opt-in, e.g. {'emergency'})
+        self.auto_reject_statuses: Set[str] = set()
+        
+        self.build_status_table()
+        
+        # Capability-matched partners for support requests - capabilities never change during a run
+        self.traditional_partners: List[str] = [
+            aid for aid, agent_obj in self.agents.items()
+            if not _TRADITIONAL_PARTNER_CAPABILITIES.isdisjoint(agent_obj.capabilities)
+        ]
         
         logger.info("GenuineLLMCascadeSimulation initialized - LLM drives coordination behavior")
     
+    def build_status_table(self):
+        """Tabulate every agent's status for each flood stage as small integer codes
+        
+        Status depends only on the agent and the flood stage, so the per-turn lookup
+        becomes one array read from the column selected at the start of each tick.
+        """
+        self.status_names: List[str] = ['normal', 'alert', 'critical', 'emergency']
+        self.status_codes = status_codes = {name: code for code, name in enumerate(self.status_names)}
+        
+        self.agent_index = {agent_id: i for i, agent_id in enumerate(self.agents)}
+        self.status_table = np.empty((len(self.agents), 4), dtype=np.int8)
+        for agent_id, i in self.agent_index.items():
+            agent = self.agents[agent_id]
+            for stage in range(4):
+                status = agent.get_current_status(stage)
+                if status not in status_codes:
+                    status_codes[status] = len(self.status_names)
+                    self.status_names.append(status)
+                self.status_table[i, stage] = status_codes[status]
+        
+        self.tick_status_codes = self.status_table[:, 0]
+        
+        # Per-agent fields that never change, shared by every snapshot view
+        self.agent_static_states = [
+            {'sector': agent.sector, 'vulnerability': agent.vulnerability, 'place_name': agent.place_name}
+            for agent in self.agents.values()
+        ]
+        self.agent_state_history = np.empty((0, len(self.agents)), dtype=_AGENT_STATE_DTYPE)
+    
+    def reset_agent_llm_state(self, agent: VeniceAgent):
+        """Give the agent default LLM behaviour fields so hot paths can read them directly"""
+        agent.llm_commitments = []
+        agent.communication_frequency = 1.0
+        agent.urgency_threshold = 0.5
+        agent.partnership_preference = 'balanced'
+        agent.communication_style = 'standard'
+    
+    def reset_simulation(self):
+        """Reset simulation state, including LLM decision tracking from earlier runs"""
+        super().reset_simulation()
+        
+        for agent in self.agents.values():
+            self.reset_agent_llm_state(agent)
+        
+        self._reset_decision_aggregates()
+        self.strategy_adaptations = {}
+        self.strategy_changed_agents = set()
+        self.agent_failure_history = {}
+        self.llm_coordinator.reset_api_usage()
+    
+    @property
+    def llm_api_usage(self) -> Dict[str, int]:
+        """LLM decision call counts, kept by the coordinator as calls happen"""
+        return self.llm_coordinator.api_usage
+    
     def run_genuine_llm_scenario(self, scenario_name: str, max_ticks: int = 60, **params):
         """Run cascade scenario with genuine LLM behavioral integration"""
+        return asyncio.run(self.arun_genuine_llm_scenario(scenario_name, max_ticks, **params))
+    
+    def run_genuine_llm_batch_scenario(self, scenario_name: str, max_ticks: int = 60,
+                                       seed: int = 42, poll_interval: float = 60.0, **params):
+        """Two-pass run through the OpenAI Batch API for offline research runs
+        
+        Pass 1 replays the scenario without calling the API, recording every prompt it would
+        send (neutral placeholder answers keep the simulation moving). The prompts are run as
+        one batch, then pass 2 replays the scenario with the same seed and consumes the batch
+        answers. Prompts that only arise because a real answer differed from the placeholder
+        fall back to live calls.
+        """
+        
+        self.llm_coordinator.start_batch_recording()
+        try:
+            random.seed(seed)
+            self.run_genuine_llm_scenario(scenario_name, max_ticks, **params)
+        finally:
+            batch_lines = self.llm_coordinator.stop_batch_recording()
+        
+        logger.info(f"Pass 1 recorded {len(batch_lines)} LLM requests for batch processing")
+        try:
+            self.llm_coordinator.run_batch(batch_lines, f"genuine_llm_batch_{scenario_name}.jsonl", poll_interval)
+            
+            random.seed(seed)
+            return self.run_genuine_llm_scenario(scenario_name, max_ticks, **params)
+        finally:
+            # Batch answers belong to this run - later live runs must not replay them
+            self.llm_coordinator.batch_responses.clear()
+    
+    async def arun_genuine_llm_scenario(self, scenario_name: str, max_ticks: int = 60, **params):
+        """Async scenario loop - each tick's agent turns run concurrently on one event loop"""
         
+        # Decisions are written out with their full context as they are made; only the slim
+        # record needed for analysis stays in memory
+        self._decision_stream = open(f"genuine_llm_decisions_{scenario_name}.ndjson", 'w', buffering=1 << 20)
+        try:
+            async with self.llm_coordinator:
+                return await self._run_genuine_llm_ticks(scenario_name, max_ticks, **params)
+        finally:
+            self._decision_stream.close()
+            self._decision_stream = None
+    
+    async def _run_genuine_llm_ticks(self, scenario_name: str, max_ticks: int, **params):
         logger.info(f"Starting GENUINE LLM cascade scenario: {scenario_name}")
         
         # Reset simulation
         self.reset_simulation()
         self.cascade_events = self.create_scenario_events(scenario_name)
+        self.llm_coordinator.compile_prompt_builders(self.agents)
+        # One row of per-agent state per tick snapshot
+        self.agent_state_history = np.empty((max_ticks, len(self.agents)), dtype=_AGENT_STATE_DTYPE)
         
         logger.info(f"Loaded {len(self.cascade_events)} cascade events - LLM will influence coordination")
         
+        # Turn order is shuffled in place each tick, seeded from random. Turns run concurrently, so
+        # each turn draws from its own Random keyed by (run seed, tick, agent) rather than from the
+        # shared stream, whose order would follow LLM completion order. With a live API the order
+        # in which concurrent turns deliver messages still follows completion order, so only runs
+        # whose LLM answers arrive in a fixed order (batch pass 2, stubbed clients) replay exactly.
+        agent_order = np.fromiter(self.agents.keys(), dtype=object, count=len(self.agents))
+        order_rng = np.random.default_rng(random.getrandbits(64))
+        run_seed = random.getrandbits(64)
+        # Limit agent processing to prevent API overload
+        max_agents_per_tick = min(50, len(agent_order))  # Process max 50 agents per tick
+        p_fail = params.get('p_fail', 0.1)
+        
         # Run simulation with genuine LLM decision-making
         for tick in range(max_ticks):
             self.current_tick = tick
@@ -516,27 +1370,22 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
             
             # Update flood progression
             self.update_flood_progression(tick, max_ticks)
+            self.tick_status_codes = self.status_table[:, min(self.flood_stage, 3)]
             
             # Process agents with GENUINE LLM decision-making (limit to prevent excessive API calls)
-            agent_order = list(self.agents.keys())
-            random.shuffle(agent_order)
-            
-            # Limit agent processing to prevent API overload
-            max_agents_per_tick = min(50, len(agent_order))  # Process max 50 agents per tick
-            for i, agent_id in enumerate(agent_order[:max_agents_per_tick]):
-                agent = self.agents[agent_id]
-                try:
-                    self.process_genuine_llm_turn(agent, params.get('p_fail', 0.1))
-                except Exception as e:
-                    logger.error(f"Error processing agent {agent_id} at tick {tick}: {e}")
-                    # Continue with other agents rather than stopping simulation
-                    continue
+            order_rng.shuffle(agent_order)
+            await asyncio.gather(*[
+                self._process_agent_turn_safely(self.agents[agent_id], p_fail,
+                                                random.Random(f"{run_seed}:{tick}:{agent_id}"))
+                for agent_id in agent_order[:max_agents_per_tick]
+            ])
             
             # Take snapshot with LLM analysis
             self.take_genuine_llm_snapshot()
             
             if tick % 15 == 0:
-                llm_decisions = len([d for d in self.llm_decisions if d.get('tick') == tick])
+                tick_decisions = self._tick_decision_span(tick)
+                llm_decisions = tick_decisions.stop - tick_decisions.start
                 logger.info(f"Tick {tick}: {llm_decisions} LLM coordination decisions made")
                 
             # Safety check: prevent runaway API usage
@@ -546,38 +1395,48 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
                     continue
         
         results = self.get_genuine_llm_results()
-        logger.info(f"Genuine LLM scenario complete: {len(self.llm_decisions)} LLM decisions influenced coordination")
+        logger.info(f"Genuine LLM scenario complete: {len(self._decision_ticks)} LLM decisions influenced coordination")
         
         return results
     
-    def process_genuine_llm_turn(self, agent, p_fail: float):
-        """Process agent turn with genuine LLM decision-making"""
+    async def _process_agent_turn_safely(self, agent, p_fail: float, rng: random.Random):
+        try:
+            await self.process_genuine_llm_turn(agent, p_fail, rng)
+        except Exception as e:
+            logger.error(f"Error processing agent {agent.agent_id} at tick {self.current_tick}: {e}")
+            # Continue with other agents rather than stopping simulation
+    
+    async def process_genuine_llm_turn(self, agent, p_fail: float, rng=random):
+        """Process agent turn with genuine LLM decision-making - all of the turn's draws come from rng"""
         
         # Update agent status
-        new_status = agent.get_current_status(self.flood_stage)
+        new_status = self.status_names[self.tick_status_codes[self.agent_index[agent.agent_id]]]
         agent.status = new_status
         
+        # Take this tick's messages up front - other agents keep delivering while we await the LLM
+        incoming_messages = agent.message_queue
+        agent.message_queue = []
+        
         # Apply strategy adaptations based on failure history
-        self.apply_strategy_adaptations(agent)
+        await self.apply_strategy_adaptations(agent)
         
         # Process incoming messages with LLM coordination decisions
-        processed_messages = 0
-        for message in agent.message_queue[:5]:  # Limit processing
+        request_messages = []
+        for message in incoming_messages[:5]:  # Limit processing
             # Handle both regular Message and GenuineLLMMessage objects
             intent = getattr(message, 'intent', None)
             if intent == 'request_support' or (hasattr(message, 'payload') and message.payload.get('intent') == 'request_support'):
-                try:
-                    self.make_genuine_llm_coordination_decision(agent, message)
-                    processed_messages += 1
-                    # Limit LLM calls per agent per tick to prevent API overload
-                    if processed_messages >= 3:
-                        break
-                except Exception as e:
-                    logger.error(f"Error in LLM coordination decision for {agent.agent_id}: {e}")
-                    # Skip this message but continue with others
-                    continue
-        
-        agent.message_queue = []
+                request_messages.append(message)
+                # Limit decisions per agent per tick to prevent API overload
+                if len(request_messages) >= 3:
+                    break
+        
+        if request_messages:
+            try:
+                # One LLM call decides every pending request of this agent
+                await self.make_genuine_llm_coordination_decisions(agent, request_messages, rng)
+            except Exception as e:
+                logger.error(f"Error in LLM coordination decision for {agent.agent_id}: {e}")
         
         # Generate support requests with LLM content analysis - FORCE MORE ACTIVITY
         should_generate_request = (
@@ -587,67 +1446,71 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
             len(self.active_events) > 0 and self.current_tick % 5 == 0
         ) or (
             # And generate some baseline requests even in normal conditions
-            self.current_tick % 10 == 0 and random.random() < 0.3
+            self.current_tick % 10 == 0 and rng.random() < 0.3
         )
         
-        if should_generate_request:
-            self.generate_llm_enhanced_requests(agent)
+        # Decided before checking needs so the baseline draw keeps the random sequence unchanged
+        if should_generate_request and agent.unmet_needs:
+            await self.generate_llm_enhanced_requests(agent, rng)
     
-    def make_genuine_llm_coordination_decision(self, receiver_agent, request_message):
-        """Make coordination decision using LLM reasoning - replaces hard-coded logic"""
+    async def make_genuine_llm_coordination_decisions(self, receiver_agent, request_messages, rng=random):
+        """Make coordination decisions using LLM reasoning - replaces hard-coded logic"""
         
         context = {
             'flood_stage': self.flood_stage,
             'active_events': list(self.active_events),
-            'system_degradation': np.mean(list(self.system_states.values())),
-            'infrastructure_resilience': 1.0 - np.mean(list(self.system_states.values()))
+            'system_degradation': self.mean_system_state,
+            'infrastructure_resilience': 1.0 - self.mean_system_state
         }
         
-        receiver_data = {
-            'place_name': receiver_agent.place_name,
-            'sector': receiver_agent.sector,
-            'status': receiver_agent.status,
-            'capabilities': receiver_agent.capabilities
-        }
-        
-        # Convert regular Message to dict format for LLM
-        if hasattr(request_message, 'to_dict'):
-            message_dict = request_message.to_dict()
+        if receiver_agent.status in self.auto_reject_statuses:
+            # Receiver cannot take on commitments in this state - no LLM call needed
+            unavailable = LLMDecision('reject', None, f"Receiver unavailable (status={receiver_agent.status})",
+                                      [], 0.0, 0.0, source='rule')
+            turn_decisions = [(unavailable, None)] * len(request_messages)
         else:
-            # Handle regular Message objects
-            message_dict = {
-                'sender': request_message.sender,
-                'receiver': request_message.receiver,
-                'tick': getattr(request_message, 'tick', self.current_tick),
-                'intent': getattr(request_message, 'intent', 'request_support'),
-                'content': getattr(request_message, 'content', 'Request for support'),
-                'payload': getattr(request_message, 'payload', {'need': 'support', 'urgency': 'high'})
-            }
-        
-        # LLM makes the coordination decision
-        llm_decision = self.llm_coordinator.make_coordination_decision(
-            receiver_data, message_dict, context
-        )
-        
-        # Update API usage tracking from context
-        self.llm_api_usage['total_calls'] += context.get('api_usage', {}).get('total_calls', 0)
-        self.llm_api_usage['successful_calls'] += context.get('api_usage', {}).get('successful_calls', 0)
-        self.llm_api_usage['fallback_usage'] += context.get('api_usage', {}).get('fallback_usage', 0)
+            # LLM makes all coordination decisions for this agent's turn
+            turn_decisions = await self.llm_coordinator.decide_turn(receiver_agent, request_messages, context)
         
-        # Record LLM decision for analysis
-        self.llm_decisions.append({
-            'tick': self.current_tick,
-            'receiver': receiver_agent.agent_id,
-            'sender': request_message.sender,
-            'decision': llm_decision,
-            'context': context
-        })
+        for request_message, (llm_decision, effectiveness) in zip(request_messages, turn_decisions):
+            await self.execute_llm_coordination_decision(
+                receiver_agent, request_message, llm_decision, effectiveness, context, rng
+            )
+    
+    async def execute_llm_coordination_decision(self, receiver_agent, request_message,
+                                                llm_decision: LLMDecision, effectiveness: Tuple[float, float],
+                                                context: Dict, rng=random):
+        """Record an LLM coordination decision and carry it out"""
         
-        # Execute decision with LLM-determined probability - THIS IS THE KEY CHANGE
-        success_probability = self.calculate_llm_success_probability(llm_decision, request_message)
+        need = getattr(request_message, 'payload', {}).get('need', 'support')
         
-        # LLM decision DIRECTLY determines coordination outcome
-        coordination_succeeds = llm_decision.decision_type == 'commit' and random.random() < success_probability
+        # Record LLM decision for analysis - the full record goes to the decision log only.
+        # Local rule decisions are logged but kept out of the LLM decision metrics.
+        if llm_decision.source == 'llm':
+            self._record_decision_aggregates(llm_decision)
+        else:
+            self._rule_decision_count += 1
+        if self._decision_stream is not None:
+            self._decision_stream.write(json.dumps({
+                'tick': self.current_tick,
+                'receiver': receiver_agent.agent_id,
+                'sender': request_message.sender,
+                'decision_type': llm_decision.decision_type,
+                'confidence': llm_decision.confidence,
+                'reasoning': llm_decision.reasoning,
+                'priority_score': llm_decision.priority_score,
+                'partnership_strength': llm_decision.partnership_strength,
+                'source': llm_decision.source,
+                'context': context
+            }) + '\n')
+        
+        # LLM decision DIRECTLY determines coordination outcome - only a commit can succeed,
+        # so other decisions skip the probability (and any message analysis call it needs)
+        coordination_succeeds = False
+        if llm_decision.decision_type == 'commit':
+            # Execute decision with LLM-determined probability - THIS IS THE KEY CHANGE
+            success_probability = await self.calculate_llm_success_probability(llm_decision, request_message, effectiveness)
+            coordination_succeeds = rng.random() < success_probability
         
         if coordination_succeeds:
             # Send commit with LLM reasoning
@@ -659,11 +1522,11 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
                 tick=self.current_tick,
                 intent='commit',
                 content=response_content,
-                payload={'need': message_dict.get('payload', {}).get('need', 'support'), 'llm_reasoning': llm_decision.reasoning},
+                payload={'need': need, 'llm_reasoning': llm_decision.reasoning},
                 llm_decision=llm_decision
             )
             
-            self.send_genuine_llm_message(response, 0.05)  # Very low failure rate for LLM decisions
+            self.send_genuine_llm_message(response, 0.05, rng)  # Very low failure rate for LLM decisions
             
             # Actually fulfill the coordination request - CRITICAL FOR BEHAVIORAL IMPACT
             self.fulfill_llm_coordination_request(receiver_agent, request_message, llm_decision)
@@ -678,82 +1541,56 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
                 tick=self.current_tick,
                 intent='reject',
                 content=response_content,
-                payload={'need': message_dict.get('payload', {}).get('need', 'support'), 'llm_reasoning': llm_decision.reasoning},
+                payload={'need': need, 'llm_reasoning': llm_decision.reasoning},
                 llm_decision=llm_decision
             )
             
-            self.send_genuine_llm_message(response, 0.05)
+            self.send_genuine_llm_message(response, 0.05, rng)
             
             # Track coordination failure for strategy adaptation
             self.track_coordination_failure(receiver_agent, request_message, llm_decision)
     
-    def calculate_llm_success_probability(self, llm_decision: LLMDecision, request_message) -> float:
+    async def calculate_llm_success_probability(self, llm_decision: LLMDecision, request_message,
+                                                effectiveness: Tuple[float, float] = None) -> float:
         """Calculate success probability based on LLM decision quality - DELIBERATELY DIFFERENT FROM 0.7"""
         
-        # Start with LLM confidence as base - this makes it fundamentally different from fixed 0.7
-        base_probability = llm_decision.confidence * 0.6  # Scale confidence to be base
-        
-        # HEALTH INFRASTRUCTURE PRIORITY BOOST
-        health_priority_boost = 0.0
-        if hasattr(request_message, 'sender') and request_message.sender in self.agents:
-            sender_agent = self.agents[request_message.sender]
-            if getattr(sender_agent, 'sector', '') == 'health':
-                health_priority_boost = 0.25  # Significant boost for health infrastructure
-        
-        # LLM reasoning quality influences success (longer reasoning = better thought-out decision)
-        reasoning_quality = min(0.3, len(llm_decision.reasoning) / 200.0)  # Reward detailed reasoning
-        
-        # Priority/urgency influences success significantly
-        priority_bonus = llm_decision.priority_score * 0.4  # Higher weight
-        
-        # Partnership potential influences success
-        partnership_bonus = llm_decision.partnership_strength * 0.2
+        sender_agent = self.agents.get(getattr(request_message, 'sender', None))
         
         # Message effectiveness influences success
-        content_bonus = 0.0
-        if hasattr(request_message, 'content'):
+        urgency = authenticity = 0.0
+        if effectiveness is not None:
+            # Already analysed alongside the coordination decision
+            urgency, authenticity = effectiveness
+        elif hasattr(request_message, 'content'):
             message_content = getattr(request_message, 'content', '')
             if message_content:
-                urgency, authenticity = self.llm_coordinator.analyze_message_effectiveness(
-                    message_content, {'place_name': getattr(request_message, 'sender', 'Unknown')}
+                urgency, authenticity = await self.llm_coordinator.analyze_message_effectiveness(
+                    message_content, self.llm_coordinator.sender_context(request_message)
                 )
-                content_bonus = (urgency + authenticity) * 0.15  # Higher weight
-        
-        # Communication style modifier based on actual agent adaptation
-        style_bonus = 0.0
-        if hasattr(request_message, 'sender') and request_message.sender in self.agents:
-            sender_agent = self.agents[request_message.sender]
-            comm_style = getattr(sender_agent, 'communication_style', 'standard')
-            style_bonus = {
-                'urgent': 0.1,   # Urgent style gets attention
-                'formal': 0.05,  # Formal style is respected
-                'standard': 0.0
-            }.get(comm_style, 0.0)
-        
-        # Decision type modifier - negotiate and redirect should have different success patterns
-        decision_modifier = {
-            'commit': 0.1,
-            'negotiate': 0.05,
-            'redirect': -0.1,
-            'reject': -0.3
-        }.get(llm_decision.decision_type, 0.0)
-        
-        final_probability = base_probability + health_priority_boost + reasoning_quality + priority_bonus + partnership_bonus + content_bonus + style_bonus + decision_modifier
-        
-        # Ensure wide variance from 0.7 - this is critical for validation
-        final_probability = min(0.98, max(0.02, final_probability))
-        
-        return final_probability
-    
-    def generate_llm_enhanced_requests(self, agent):
+        
+        return _score_success(
+            llm_decision.confidence,
+            len(llm_decision.reasoning),
+            llm_decision.priority_score,
+            llm_decision.partnership_strength,
+            urgency,
+            authenticity,
+            # HEALTH INFRASTRUCTURE PRIORITY BOOST
+            sender_agent is not None and sender_agent.sector == 'health',
+            # Communication style modifier based on actual agent adaptation
+            sender_agent.communication_style if sender_agent is not None else None,
+            llm_decision.decision_type
+        )
+    
+    async def generate_llm_enhanced_requests(self, agent, rng=random):
         """Generate support requests with LLM content and partner discovery"""
         
         # NO MOCK DATA - only proceed if agent genuinely has unmet needs
-        if not hasattr(agent, 'unmet_needs') or not agent.unmet_needs:
+        if not agent.unmet_needs:
             # Do not generate artificial needs - genuine research requires real needs only
             return
             
-        need = random.choice(agent.unmet_needs)
+        need = rng.choice(agent.unmet_needs)
         
         # Use LLM to discover creative partnerships
         crisis_context = {
@@ -762,16 +1599,15 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
             'description': f"Multi-hazard cascade with {len(self.active_events)} active events"
         }
         
-        existing_partners = [aid for aid, agent_obj in self.agents.items() 
-                           if any(cap in agent_obj.capabilities for cap in ['emergency_response', 'pumping'])]
+        existing_partners = self.traditional_partners
         
-        creative_partners = self.llm_coordinator.discover_creative_partnerships(
+        creative_partners = await self.llm_coordinator.discover_creative_partnerships(
             {'place_name': agent.place_name, 'sector': agent.sector},
             need, crisis_context, existing_partners
         )
         
         # Use agent partnership preferences to choose partners
-        partnership_pref = getattr(agent, 'partnership_preference', 'balanced')
+        partnership_pref = agent.partnership_preference
         
         if partnership_pref == 'creative' and creative_partners:
             # Prefer creative partnerships
@@ -785,27 +1621,24 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
         
         if all_partners:
             # Choose partner based on communication style and frequency
-            comm_freq = getattr(agent, 'communication_frequency', 1.0)
+            comm_freq = agent.communication_frequency
             if comm_freq > 1.5 and len(all_partners) > 1:
                 # High frequency agents contact multiple partners
-                target_partner = random.choice(all_partners[:2])
+                target_partner = rng.choice(all_partners[:2])
             else:
-                target_partner = random.choice(all_partners)
+                target_partner = rng.choice(all_partners)
             if target_partner in self.agents:
                 
                 # Generate content based on communication style
-                comm_style = getattr(agent, 'communication_style', 'standard')
+                comm_style = agent.communication_style
                 
-                if comm_style == 'urgent':
-                    request_content = f"URGENT: {agent.place_name} requires immediate {need} assistance! Emergency coordination needed during cascade crisis."
-                elif comm_style == 'formal':
-                    request_content = f"Formal request from {agent.place_name}: We respectfully request coordination assistance for {need} during the current emergency situation."
-                else:
-                    request_content = f"{agent.place_name} urgently needs {need} - can you assist during this cascade emergency?"
+                request_content = _REQUEST_CONTENT_TEMPLATES.get(
+                    comm_style, _REQUEST_CONTENT_TEMPLATES['standard']
+                ).format(place_name=agent.place_name, need=need)
                 
                 # Use LLM to generate request decision parameters
-                request_decision = self.llm_coordinator.generate_request_decision(
-                    agent, need, crisis_context
+                request_decision = await self.llm_coordinator.generate_request_decision(
+                    {'place_name': agent.place_name, 'status': agent.status}, need, crisis_context
                 )
                 
                 request = GenuineLLMMessage(
@@ -818,7 +1651,7 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
                     llm_decision=request_decision
                 )
                 
-                self.send_genuine_llm_message(request, 0.1)
+                self.send_genuine_llm_message(request, 0.1, rng)
     
     def fulfill_llm_coordination_request(self, receiver_agent, request_message, llm_decision: LLMDecision):
         """Actually fulfill coordination request - CRITICAL for behavioral impact"""
@@ -840,7 +1673,7 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
             requesting_agent = self.agents[requesting_agent_id]
             
             # Remove unmet need based on LLM decision quality
-            if hasattr(requesting_agent, 'unmet_needs') and need in requesting_agent.unmet_needs:
+            if need in requesting_agent.unmet_needs:
                 if fulfillment_quality > 0.5:  # High quality LLM decision removes need completely
                     requesting_agent.unmet_needs.remove(need)
                     logger.info(f"LLM coordination: {receiver_agent.place_name} successfully fulfilled {need} for {requesting_agent.place_name}")
@@ -849,9 +1682,6 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
                     logger.info(f"LLM coordination: {receiver_agent.place_name} partially helped with {need} for {requesting_agent.place_name}")
         
         # Add commitment tracking to receiver
-        if not hasattr(receiver_agent, 'llm_commitments'):
-            receiver_agent.llm_commitments = []
-        
         receiver_agent.llm_commitments.append({
             'tick': self.current_tick,
             'need': need,
@@ -859,29 +1689,32 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
             'decision_quality': fulfillment_quality,
             'llm_reasoning': llm_decision.reasoning
         })
+        self._total_commitments += 1
+        if fulfillment_quality > 0.5:
+            self._successful_fulfillments += 1
+    
     def track_coordination_failure(self, receiver_agent, request_message, llm_decision: LLMDecision):
         """Track coordination failures for strategy adaptation"""
         
         agent_id = receiver_agent.agent_id
         if agent_id not in self.agent_failure_history:
-            self.agent_failure_history[agent_id] = []
+            # Bounded to the last 10 failures to prevent memory bloat
+            self.agent_failure_history[agent_id] = deque(maxlen=10)
         
+        need = request_message.payload.get('need', 'unknown')
         failure_record = {
             'tick': self.current_tick,
-            'need': request_message.payload.get('need', 'unknown'),
+            'need': need,
             'decision_type': llm_decision.decision_type,
             'confidence': llm_decision.confidence,
             'reasoning': llm_decision.reasoning,
+            # Formatted once here rather than every time a strategy prompt is built
             'description': f"Failed to coordinate {request_message.payload.get('need')} - {llm_decision.decision_type}"
         }
         
         self.agent_failure_history[agent_id].append(failure_record)
-        
-        # Limit history to last 10 failures to prevent memory bloat
-        if len(self.agent_failure_history[agent_id]) > 10:
-            self.agent_failure_history[agent_id] = self.agent_failure_history[agent_id][-10:]
     
-    def apply_strategy_adaptations(self, agent):
+    async def apply_strategy_adaptations(self, agent):
         """Apply strategy adaptations based on agent failure history"""
         
         agent_id = agent.agent_id
@@ -893,7 +1726,7 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
             
             if len(recent_failures) >= 2:
                 # Use LLM to adapt strategy
-                strategy = self.llm_coordinator.adapt_coordination_strategy(
+                strategy = await self.llm_coordinator.adapt_coordination_strategy(
                     {'place_name': agent.place_name, 'agent_id': agent_id},
                     recent_failures
                 )
@@ -915,48 +1748,41 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
         changes = strategy.get('changes', [])
         
         for change in changes:
-            change_lower = change.lower().strip()
+            change_lower = change.lower()  # Substring tests below need no strip()
             
             # Modify agent communication frequency
             if 'frequent' in change_lower or 'more message' in change_lower:
-                if not hasattr(agent, 'communication_frequency'):
-                    agent.communication_frequency = 1.0
+                self.strategy_changed_agents.add(agent.agent_id)
                 agent.communication_frequency = min(2.0, agent.communication_frequency * 1.5)
                 applied_changes.append(f"Increased communication frequency to {agent.communication_frequency:.1f}x")
             
             # Modify urgency thresholds
             elif 'urgent' in change_lower or 'priority' in change_lower:
-                if not hasattr(agent, 'urgency_threshold'):
-                    agent.urgency_threshold = 0.5
+                self.strategy_changed_agents.add(agent.agent_id)
                 agent.urgency_threshold = max(0.2, agent.urgency_threshold - 0.1)
                 applied_changes.append(f"Lowered urgency threshold to {agent.urgency_threshold:.1f}")
             
             # Modify partnership preferences
             elif 'partner' in change_lower or 'collaborate' in change_lower:
-                if not hasattr(agent, 'partnership_preference'):
-                    agent.partnership_preference = 'balanced'
+                self.strategy_changed_agents.add(agent.agent_id)
                 agent.partnership_preference = 'creative'
                 applied_changes.append("Changed to prefer creative partnerships")
             
             # Modify language/tone
             elif 'formal' in change_lower:
-                if not hasattr(agent, 'communication_style'):
-                    agent.communication_style = 'standard'
                 agent.communication_style = 'formal'
                 applied_changes.append("Adopted formal communication style")
             
             elif 'direct' in change_lower or 'urgent' in change_lower:
-                if not hasattr(agent, 'communication_style'):
-                    agent.communication_style = 'standard'
                 agent.communication_style = 'urgent'
                 applied_changes.append("Adopted urgent communication style")
         
         return applied_changes
     
-    def send_genuine_llm_message(self, message: GenuineLLMMessage, p_fail: float):
+    def send_genuine_llm_message(self, message: GenuineLLMMessage, p_fail: float, rng=random):
         """Send LLM message with behavioral tracking"""
         
-        if random.random() < p_fail:
+        if rng.random() < p_fail:
             message.success = False
         
         # Deliver message
@@ -971,33 +1797,55 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
                 message.success = False
         
         self.message_log.append(message)
+        
+        if message.intent == 'request_support':
+            self._total_partnerships += 1
+            # If receiver doesn't have obvious capability for this need, it's creative
+            receiver_agent = self.agents.get(message.receiver)
+            if receiver_agent is not None and message.payload.get('need', '') not in receiver_agent.capabilities:
+                self._creative_partnerships += 1
     
     def take_genuine_llm_snapshot(self):
         """Take snapshot with LLM decision analysis"""
         
+        tick_confidences = np.frombuffer(self._decision_confidence)[self._tick_decision_span(self.current_tick)]
         snapshot = {
             'tick': self.current_tick,
             'flood_stage': self.flood_stage,
             'active_events': list(self.active_events),
-            'system_states': copy.deepcopy(self.system_states),
-            'llm_decisions_count': len([d for d in self.llm_decisions if d['tick'] == self.current_tick]),
-            'average_decision_confidence': np.mean([d['decision'].confidence for d in self.llm_decisions 
-                                                  if d['tick'] == self.current_tick]) if self.llm_decisions else 0,
-            'agents': {}
+            'system_states': dict(self.system_states),
+            'llm_decisions_count': len(tick_confidences),
+            'average_decision_confidence': np.mean(tick_confidences) if len(self._decision_ticks) else 0,
+            'agents': self._record_agent_states()
         }
         
-        for agent_id, agent in self.agents.items():
-            snapshot['agents'][agent_id] = {
-                'status': getattr(agent, 'status', 'unknown'),
-                'queue_len': len(getattr(agent, 'message_queue', [])),
-                'unmet_needs': len(getattr(agent, 'unmet_needs', [])),
-                'sector': getattr(agent, 'sector', 'unknown'),
-                'vulnerability': getattr(agent, 'vulnerability', 0.5),
-                'place_name': getattr(agent, 'place_name', f'agent_{agent_id}')
-            }
-        
         self.tick_snapshots.append(snapshot)
     
+    def _record_agent_states(self) -> 'AgentStatesView':
+        """Write this tick's per-agent state into agent_state_history and return a view of it"""
+        
+        row = len(self.tick_snapshots)
+        if row == len(self.agent_state_history):
+            # Snapshots taken outside a sized run grow the history geometrically
+            self.agent_state_history = np.concatenate([
+                self.agent_state_history,
+                np.empty((max(1, row), len(self.agents)), dtype=_AGENT_STATE_DTYPE)
+            ])
+        
+        agents = self.agents.values()
+        for agent in agents:
+            if agent.status not in self.status_codes:
+                self.status_codes[agent.status] = len(self.status_names)
+                self.status_names.append(agent.status)
+        
+        states = self.agent_state_history[row]
+        count = len(self.agents)
+        states['status'] = np.fromiter((self.status_codes[agent.status] for agent in agents), np.int8, count)
+        states['queue_len'] = np.fromiter((len(agent.message_queue) for agent in agents), np.int32, count)
+        states['unmet_needs'] = np.fromiter((len(agent.unmet_needs) for agent in agents), np.int32, count)
+        
+        return AgentStatesView(self.agent_index, states, self.agent_static_states, self.status_names)
+    
     def get_genuine_llm_results(self) -> Dict[str, Any]:
         """Get results with genuine LLM behavioral analysis"""
         
@@ -1008,8 +1856,9 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
         
         # Calculate LLM-specific metrics with actual behavioral impact
         llm_metrics = {
-            'total_llm_decisions': len(self.llm_decisions),
-            'average_decision_confidence': np.mean([d['decision'].confidence for d in self.llm_decisions]) if self.llm_decisions else 0.5,
+            'total_llm_decisions': len(self._decision_ticks),
+            'rule_based_decisions': self._rule_decision_count,
+            'average_decision_confidence': np.mean(self._decision_confidence) if len(self._decision_ticks) else 0.5,
             'decision_type_distribution': self.get_decision_distribution(),
             'llm_coordination_effectiveness': self.calculate_llm_coordination_effectiveness(),
             'partnership_discovery_rate': self.calculate_partnership_discovery_rate(),
@@ -1017,11 +1866,14 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
             'llm_fulfillment_impact': self.calculate_llm_fulfillment_impact(),
             'coordination_success_variance': self.calculate_coordination_variance(),
             'api_usage_stats': self.llm_api_usage.copy(),
+            'llm_cache_stats': {
+                'hits': self.llm_coordinator.cache_hits,
+                'misses': self.llm_coordinator.cache_misses,
+                'entries': len(self.llm_coordinator.response_cache),
+                'fast_path_decisions': self.llm_coordinator.fast_path_hits
+            },
             'strategy_adaptations_applied': len(self.strategy_adaptations),
-            'agents_with_strategy_changes': len([aid for aid, agent in self.agents.items()
-                                              if hasattr(agent, 'communication_frequency') or
-                                                 hasattr(agent, 'urgency_threshold') or
-                                                 hasattr(agent, 'partnership_preference')]),
+            'agents_with_strategy_changes': len(self.strategy_changed_agents),
             'failure_driven_adaptations': len([s for s in self.strategy_adaptations.values()
                                              if len(s.get('applied_changes', [])) > 0])
         }
@@ -1031,45 +1883,68 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
     def calculate_llm_fulfillment_impact(self) -> float:
         """Calculate how much LLM decisions actually impacted coordination fulfillment"""
         
-        total_commitments = 0
-        successful_fulfillments = 0
-        
-        for agent in self.agents.values():
-            if hasattr(agent, 'llm_commitments'):
-                total_commitments += len(agent.llm_commitments)
-                successful_fulfillments += len([c for c in agent.llm_commitments if c['decision_quality'] > 0.5])
-        
-        if total_commitments == 0:
+        if self._total_commitments == 0:
             return 0.0
             
-        return successful_fulfillments / total_commitments
+        return self._successful_fulfillments / self._total_commitments
+    
+    def _reset_decision_aggregates(self):
+        """Running aggregates updated as decisions, commitments and requests are recorded
+        
+        Per-decision scores are kept column-wise for vectorised metrics; the counters
+        let the summary metrics avoid rescanning the full run history.
+        """
+        self._decision_ticks = array('q')
+        self._decision_confidence = array('d')
+        self._decision_priority = array('d')
+        self._decision_partnership = array('d')
+        self._decision_type_counts = Counter()
+        # Confidence of each commit whose reasoning matches a keyword category
+        self._commit_keyword_confidence = {category: array('d') for category in _CONTENT_KEYWORD_RES}
+        self._reasoning_samples: List[str] = []
+        self._rule_decision_count = 0  # Local auto-rejects, not part of the LLM metrics
+        self._total_commitments = 0
+        self._successful_fulfillments = 0
+        self._total_partnerships = 0
+        self._creative_partnerships = 0
+    
+    def _record_decision_aggregates(self, llm_decision: LLMDecision):
+        """Fold one coordination decision into the running aggregates"""
+        self._decision_ticks.append(self.current_tick)
+        self._decision_confidence.append(llm_decision.confidence)
+        self._decision_priority.append(llm_decision.priority_score)
+        self._decision_partnership.append(llm_decision.partnership_strength)
+        self._decision_type_counts[llm_decision.decision_type] += 1
+        if len(self._reasoning_samples) < _REASONING_SAMPLE_SIZE:
+            self._reasoning_samples.append(llm_decision.reasoning)
+        if llm_decision.decision_type == 'commit':
+            for category, keyword_re in _CONTENT_KEYWORD_RES.items():
+                if keyword_re.search(llm_decision.reasoning):
+                    self._commit_keyword_confidence[category].append(llm_decision.confidence)
+    
+    def _tick_decision_span(self, tick: int) -> slice:
+        """Index range of the decisions made during tick - decisions are recorded in tick order"""
+        return slice(bisect_left(self._decision_ticks, tick), bisect_right(self._decision_ticks, tick))
     
     def calculate_coordination_variance(self) -> float:
         """Calculate variance in coordination success rates - should be high for genuine LLM"""
         
-        if not self.llm_decisions:
+        if len(self._decision_ticks) <= 1:
             return 0.0
         
-        success_rates = []
-        for decision_record in self.llm_decisions:
-            # Calculate individual decision success probability
-            decision = decision_record['decision']
-            base_prob = decision.confidence * 0.6
-            priority_bonus = decision.priority_score * 0.4
-            partnership_bonus = decision.partnership_strength * 0.2
-            
-            individual_success_rate = min(0.98, max(0.02, base_prob + priority_bonus + partnership_bonus))
-            success_rates.append(individual_success_rate)
-        
-        if len(success_rates) <= 1:
-            return 0.0
-            
-        return np.var(success_rates)  # High variance indicates genuine behavioral differences
+        # Individual decision success probabilities, computed over all decisions at once
+        # and accumulated in place so only one scratch array is allocated
+        success_rates = np.frombuffer(self._decision_confidence) * 0.6
+        scratch = np.multiply(np.frombuffer(self._decision_priority), 0.4)
+        success_rates += scratch
+        success_rates += np.multiply(np.frombuffer(self._decision_partnership), 0.2, out=scratch)
+        np.clip(success_rates, 0.02, 0.98, out=success_rates)
+        return float(success_rates.var())  # High variance indicates genuine behavioral differences
     
     def analyze_llm_decisions(self) -> Dict[str, Any]:
         """Analyze patterns in LLM decision-making"""
         
-        if not self.llm_decisions:
+        if not self._decision_ticks:
             return {}
         
         analysis = {
@@ -1079,111 +1954,53 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
             'temporal_decision_evolution': []
         }
         
-        # Group by confidence levels
-        for decision_record in self.llm_decisions:
-            confidence = decision_record['decision'].confidence
-            conf_bucket = f"{int(confidence * 10) * 10}%-{int(confidence * 10) * 10 + 10}%"
-            if conf_bucket not in analysis['decisions_by_confidence']:
-                analysis['decisions_by_confidence'][conf_bucket] = 0
-            analysis['decisions_by_confidence'][conf_bucket] += 1
+        # Group by confidence levels, in 10% buckets
+        bucket_counts = np.bincount((np.frombuffer(self._decision_confidence) * 10).astype(np.int64))
+        analysis['decisions_by_confidence'] = {
+            f"{bucket * 10}%-{bucket * 10 + 10}%": int(count)
+            for bucket, count in enumerate(bucket_counts) if count
+        }
         
         # Extract reasoning patterns
-        reasoning_samples = [d['decision'].reasoning for d in self.llm_decisions[:10]]
-        analysis['reasoning_patterns'] = reasoning_samples
+        analysis['reasoning_patterns'] = list(self._reasoning_samples)
         
         return analysis
     
     def get_decision_distribution(self) -> Dict[str, int]:
         """Get distribution of LLM decision types"""
         
-        distribution = {}
-        for decision_record in self.llm_decisions:
-            decision_type = decision_record['decision'].decision_type
-            distribution[decision_type] = distribution.get(decision_type, 0) + 1
-        
-        return distribution
+        return dict(self._decision_type_counts)
     
     def calculate_llm_coordination_effectiveness(self) -> float:
         """Calculate coordination effectiveness influenced by LLM decisions"""
         
-        if not self.llm_decisions:
+        if not self._decision_ticks:
             return 0.0
         
-        successful_decisions = [d for d in self.llm_decisions if d['decision'].decision_type == 'commit']
-        total_decisions = len(self.llm_decisions)
-        
-        if total_decisions == 0:
-            return 0.0
-        
-        return len(successful_decisions) / total_decisions
+        return self._decision_type_counts['commit'] / len(self._decision_ticks)
     
     def calculate_partnership_discovery_rate(self) -> float:
         """Calculate ACTUAL rate of creative partnership discovery from real data"""
         
-        total_partnerships = 0
-        creative_partnerships = 0
-        
-        # Track actual partnership usage from message log
-        for message in self.message_log:
-            if hasattr(message, 'llm_decision') and message.intent == 'request_support':
-                total_partnerships += 1
-                # Check if this was a creative partnership (not in obvious capability matches)
-                receiver_id = message.receiver
-                if receiver_id in self.agents:
-                    receiver_agent = self.agents[receiver_id]
-                    need = message.payload.get('need', '')
-                    
-                    # If receiver doesn't have obvious capability for this need, it's creative
-                    if need not in receiver_agent.capabilities:
-                        creative_partnerships += 1
-        
-        if total_partnerships == 0:
+        # Counted per request_support message as it is sent
+        if self._total_partnerships == 0:
             return 0.0
             
-        return creative_partnerships / total_partnerships
+        return self._creative_partnerships / self._total_partnerships
     
     def analyze_content_influence(self) -> Dict[str, float]:
         """Analyze ACTUAL message content influence on coordination outcomes from real data"""
         
-        if not self.llm_decisions:
+        if not self._decision_ticks:
             return {"no_data": 0.0}
         
-        # Group messages by content characteristics and measure success rates
-        content_analysis = {
-            'urgent_keywords': [],
-            'formal_keywords': [],
-            'cultural_keywords': [],
-            'technical_keywords': []
-        }
-        
-        urgent_words = ['urgent', 'emergency', 'critical', 'immediate', 'help']
-        formal_words = ['request', 'coordinate', 'assistance', 'support']
-        cultural_words = ['venice', 'acqua', 'alta', 'piazza', 'basilica']
-        technical_words = ['pump', 'system', 'infrastructure', 'capacity']
-        
-        # Analyze actual messages for content patterns and success rates
-        for decision_record in self.llm_decisions:
-            decision = decision_record['decision']
-            if decision.decision_type == 'commit':  # Only successful coordination
-                
-                # Find corresponding message content
-                reasoning = decision.reasoning.lower()
-                
-                if any(word in reasoning for word in urgent_words):
-                    content_analysis['urgent_keywords'].append(decision.confidence)
-                if any(word in reasoning for word in formal_words):
-                    content_analysis['formal_keywords'].append(decision.confidence)
-                if any(word in reasoning for word in cultural_words):
-                    content_analysis['cultural_keywords'].append(decision.confidence)
-                if any(word in reasoning for word in technical_words):
-                    content_analysis['technical_keywords'].append(decision.confidence)
-        
-        # Calculate actual success rates from real data
+        # Keyword categories of successful coordination, matched as each commit was recorded
         result = {}
-        for category, confidences in content_analysis.items():
-            if confidences:
-                result[f'{category}_avg_confidence'] = np.mean(confidences)
-                result[f'{category}_count'] = len(confidences)
+        for category, confidences in self._commit_keyword_confidence.items():
+            category_confidences = np.frombuffer(confidences)
+            if len(category_confidences):
+                result[f'{category}_avg_confidence'] = category_confidences.mean()
+                result[f'{category}_count'] = len(category_confidences)
             else:
                 result[f'{category}_avg_confidence'] = 0.0
                 result[f'{category}_count'] = 0
@@ -1191,37 +2008,19 @@ class GenuineLLMCascadeSimulation(FixedMultiHazardSimulation):
         return result
     
     def save_genuine_llm_results(self, scenario_name: str):
-        """Save results with LLM behavioral data"""
-        
-        # Save LLM decisions
-        decisions_file = f"genuine_llm_decisions_{scenario_name}.json"
-        decisions_data = [
-            {
-                'tick': d['tick'],
-                'receiver': d['receiver'], 
-                'sender': d['sender'],
-                'decision_type': d['decision'].decision_type,
-                'confidence': d['decision'].confidence,
-                'reasoning': d['decision'].reasoning,
-                'priority_score': d['decision'].priority_score,
-                'partnership_strength': d['decision'].partnership_strength
-            }
-            for d in self.llm_decisions
-        ]
+        """Save results with LLM behavioral data - decisions were already streamed to NDJSON during the run"""
         
-        with open(decisions_file, 'w') as f:
-            json.dump(decisions_data, f, indent=2)
+        decisions_file = f"genuine_llm_decisions_{scenario_name}.ndjson"
         
         # Save message log with LLM content
         messages_file = f"genuine_llm_messages_{scenario_name}.ndjson"
-        with open(messages_file, 'w') as f:
-            for msg in self.message_log:
-                f.write(json.dumps(msg.to_dict()) + '\n')
+        with open(messages_file, 'w', buffering=1 << 20) as f:
+            f.writelines(json.dumps(msg.to_dict()) + '\n' for msg in self.message_log)
         
         # Save snapshots
         snapshots_file = f"genuine_llm_snapshots_{scenario_name}.json"
-        with open(snapshots_file, 'w') as f:
-            json.dump(self.tick_snapshots, f, indent=2)
+        with open(snapshots_file, 'w', buffering=1 << 20) as f:
+            json.dump(self.tick_snapshots, f, indent=2, default=dict)  # Agent state views serialise as dicts
         
         logger.info(f"Genuine LLM results saved: {decisions_file}, {messages_file}, {snapshots_file}")
 
@@ -1284,7 +2083,7 @@ if __name__ == "__main__":
     if results:
         print(f"\n🎉 GENUINE LLM INTEGRATION COMPLETE!")
         print(f"📁 Files generated:")
-        print(f"   - genuine_llm_decisions_communication_breakdown.json")
+        print(f"   - genuine_llm_decisions_communication_breakdown.ndjson")
         print(f"   - genuine_llm_messages_communication_breakdown.ndjson")
         print(f"   - genuine_llm_snapshots_communication_breakdown.json")
         
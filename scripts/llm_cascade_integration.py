@@ -6,10 +6,14 @@ Combines structured cascade analysis with LLM-generated natural language content
 
 import json
 import random
-import copy
 import os
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from array import array
+from heapq import nlargest
 from dataclasses import dataclass
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Set, Tuple
+from types import MappingProxyType
 from pathlib import Path
 from loguru import logger
 import sys
@@ -21,25 +25,75 @@ from dotenv import load_dotenv
 
 # Import base frameworks
 from fixed_cascade_scenarios import FixedMultiHazardSimulation, CascadeEvent, HazardType
+from venice_flood_simulation import Message
 from llm_enhanced_simulation import LLMMessageGenerator, EnhancedMessage, EnhancedVeniceAgent
 
 # Load environment variables
 load_dotenv(dotenv_path='.env')
 
+# Status severity order; unknown statuses rank as emergency, unknown broadcast thresholds as critical
+_STATUS_LEVELS = ('normal', 'alert', 'critical', 'emergency')
+_STATUS_LEVEL = {status: level for level, status in enumerate(_STATUS_LEVELS)}
+
+# Capabilities that can meet a need: when looking for partners to ask, and when deciding
+# whether to help (needs missing from a map are matched by a capability of the same name)
+_PARTNER_CAPABILITIES = {
+    'protection': frozenset({'emergency_response', 'security'}),
+    'drainage': frozenset({'pumping', 'emergency_response'}),
+    'structural_support': frozenset({'emergency_response', 'rescue'}),
+    'power': frozenset({'electricity', 'power_distribution'}),
+    'communication': frozenset({'coordination', 'emergency_response'}),
+    'medical_care': frozenset({'medical_care', 'emergency_treatment'}),
+    'vehicle_access': frozenset({'mobility', 'evacuation_route'}),
+    'water_access': frozenset({'pumping', 'emergency_response'})
+}
+_SUPPORT_CAPABILITIES = {
+    'protection': frozenset({'emergency_response', 'security'}),
+    'drainage': frozenset({'pumping', 'emergency_response'}),
+    'power': frozenset({'electricity', 'power_distribution'}),
+    'medical_care': frozenset({'medical_care', 'emergency_treatment'}),
+    'evacuation': frozenset({'evacuation_route', 'mobility'})
+}
+
 class LLMCascadeSimulation(FixedMultiHazardSimulation):
     """Cascade simulation enhanced with LLM-generated message content"""
     
-    def __init__(self, agents_file: str = "venice_agents.ndjson", log_level: str = "INFO"):
+    def __init__(self, agents_file: str = "venice_agents.ndjson", log_level: str = "INFO",
+                 batch_mode: bool = False):
         # Initialize base cascade simulation
         super().__init__(agents_file, log_level)
         
         # Add LLM capabilities
         self.llm_generator = LLMMessageGenerator() if os.getenv('OPENAI_API_KEY') else None
-        self.enhanced_message_log = []  # Store LLM-enhanced messages
-        self.communication_patterns = {}  # Track communication analytics
+        # Full messages are streamed to the scenario's NDJSON log once their content is known;
+        # only running aggregates for the communication analyses stay in memory
+        self._message_stream = None
+        self._unlogged_messages: List[EnhancedMessage] = []
+        self._reset_message_aggregates()
+        self._reset_broadcasts()
+        self.communication_patterns = {}  # Track communication analytics - per-pattern columns
+        # Message priority by (intent, sender, equity weighting) - sender vulnerability never changes
+        self._priority_cache: Dict[Tuple[str, str, float], float] = {}
+        
+        # LLM content is requested once per tick for all messages created in it:
+        # content key -> (messages sharing it, prompt, structured fallback content) awaiting
+        # content, and the communication patterns whose sample message was not filled yet
+        self.llm_messages_per_call = 8
+        self._pending_llm_content: Dict[Tuple, Tuple[List[EnhancedMessage], str, str]] = {}
+        self._unfilled_pattern_samples: List[Tuple[EnhancedMessage, Dict[str, Any]]] = []
+        
+        # Batch mode (offline runs): content requests are recorded during the run and sent
+        # as one OpenAI Batch API job when the tick loop completes
+        self.batch_mode = batch_mode
+        self.batch_poll_interval = 30.0
+        self._batch_lines: List[Dict[str, Any]] = []
+        self._batch_chunks: Dict[str, List[Tuple[Tuple, List[EnhancedMessage], str, str]]] = {}
         
         # Convert agents to enhanced agents
         self.convert_to_enhanced_agents()
+        if self.llm_generator:
+            self.llm_generator.compile_agent_prompts(self.agents)
+        self.snapshot_cascade_context()
         
         logger.info(f"LLMCascadeSimulation initialized with LLM: {bool(self.llm_generator)}")
     
@@ -76,54 +130,112 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
             enhanced_agents[agent_id] = enhanced_agent
         
         self.agents = enhanced_agents
+        self._build_status_tables()
+        self._build_capability_index()
+    
+    def _build_status_tables(self):
+        """Encode per-agent status escalation and broadcast thresholds as arrays, in self.agents order
+        
+        Statuses are small integer codes into self._status_names; the first codes are
+        _STATUS_LEVELS, so a code's severity level is min(code, 3).
+        """
+        self._status_names = list(_STATUS_LEVELS)
+        self._status_codes_by_name = {name: code for code, name in enumerate(self._status_names)}
+        
+        agents = list(self.agents.values())
+        self._risk_codes = np.array(
+            [[self._status_code(agent.risk_escalation.get(f'stage_{stage}', 'emergency')) for stage in range(4)]
+             for agent in agents],
+            dtype=np.int8
+        ).reshape(len(agents), 4)
+        self._broadcast_levels = np.array(
+            [_STATUS_LEVEL.get(agent.comm_prefs['broadcast_threshold'], 2) for agent in agents],
+            dtype=np.int8
+        )
+        self._status_arr = np.zeros(len(agents), dtype=np.int8)
+        self._agent_index = {agent.agent_id: index for index, agent in enumerate(agents)}
+    
+    def _load_status_array(self):
+        self._status_arr = np.array([self._status_code(agent.status) for agent in self.agents.values()], dtype=np.int8)
+    
+    def _status_code(self, status: str) -> int:
+        code = self._status_codes_by_name.get(status)
+        if code is None:
+            code = self._status_codes_by_name[status] = len(self._status_names)
+            self._status_names.append(status)
+        return code
+    
+    def _update_status_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Status pass for the whole tick: each agent's new status code and whether it changed
+        to a level that warrants a broadcast, indexed like self.agents
+        
+        Statuses depend only on the flood stage, which is fixed within a tick.
+        """
+        new_codes = self._risk_codes[:, self.flood_stage]
+        status_changed = new_codes != self._status_arr
+        needs_broadcast = status_changed & (np.minimum(new_codes, 3) >= self._broadcast_levels)
+        self._status_arr = new_codes.copy()
+        return new_codes, needs_broadcast
+    
+    def _build_capability_index(self):
+        """Inverted capability index over self.agents - capabilities never change during a run
+        
+        Agent ids per capability are kept in self.agents order, so partner lists come out in
+        the same order as a scan over all agents.
+        """
+        self._cap_index: Dict[str, List[int]] = {}
+        self._capability_sets: Dict[str, frozenset] = {}
+        for index, agent in enumerate(self.agents.values()):
+            self._capability_sets[agent.agent_id] = frozenset(agent.capabilities)
+            for cap in self._capability_sets[agent.agent_id]:
+                self._cap_index.setdefault(cap, []).append(index)
+        self._agent_ids = list(self.agents.keys())
+        # Needs an agent raises in critical and emergency status, in the order they are added
+        self._status_needs: Dict[str, Dict[str, Tuple[str, ...]]] = {
+            agent_id: {
+                'critical': tuple(agent.needs),
+                'emergency': tuple(agent.needs) + ('evacuation', 'emergency_response')
+            }
+            for agent_id, agent in self.agents.items()
+        }
+        # need -> agents with any capability it requires, built on first use
+        self._need_candidates: Dict[str, List[str]] = {}
+    
+    def snapshot_cascade_context(self):
+        """Read-only cascade context shared by every message payload until the next snapshot
+        
+        Events, system states and the flood stage only change at the start of a tick, so the
+        run loop takes one snapshot per tick instead of copying the states into each message.
+        """
+        self._cascade_context = MappingProxyType({
+            'active_events': tuple(self.active_events),
+            'system_states': MappingProxyType(dict(self.system_states)),
+            'flood_stage': self.flood_stage
+        })
     
     def _needs_to_broadcast(self, agent, current_status: str) -> bool:
         """Check if current status warrants broadcasting"""
-        threshold = agent.comm_prefs['broadcast_threshold']
-        status_levels = ['normal', 'alert', 'critical', 'emergency']
-        
-        current_level = status_levels.index(current_status) if current_status in status_levels else 3
-        threshold_level = status_levels.index(threshold) if threshold in status_levels else 2
-        
-        return current_level >= threshold_level
+        return _STATUS_LEVEL.get(current_status, 3) >= _STATUS_LEVEL.get(agent.comm_prefs['broadcast_threshold'], 2)
     
     def _find_support_partners(self, agent, all_agents: Dict, need: str) -> List[str]:
-        """Find agents that might be able to help with a specific need"""
-        partners = []
-        
-        # Simple capability matching
-        capability_map = {
-            'protection': ['emergency_response', 'security'],
-            'drainage': ['pumping', 'emergency_response'],
-            'structural_support': ['emergency_response', 'rescue'],
-            'power': ['electricity', 'power_distribution'],
-            'communication': ['coordination', 'emergency_response'],
-            'medical_care': ['medical_care', 'emergency_treatment'],
-            'vehicle_access': ['mobility', 'evacuation_route'],
-            'water_access': ['pumping', 'emergency_response']
-        }
+        """Find agents that might be able to help with a specific need (all_agents is self.agents)"""
         
-        required_caps = capability_map.get(need, [need])
+        candidates = self._need_candidates.get(need)
+        if candidates is None:
+            candidates = self._need_candidates[need] = self._agents_with_capabilities(need)
         
-        for other_agent in all_agents.values():
-            if other_agent.agent_id != agent.agent_id:
-                if any(cap in other_agent.capabilities for cap in required_caps):
-                    partners.append(other_agent.agent_id)
-        
-        return partners[:5]  # Limit to top 5 partners
+        # Up to 5 partners other than the agent itself
+        return [agent_id for agent_id in candidates[:6] if agent_id != agent.agent_id][:5]
+    
+    def _agents_with_capabilities(self, need: str) -> List[str]:
+        positions = set()
+        for cap in _PARTNER_CAPABILITIES.get(need, (need,)):
+            positions.update(self._cap_index.get(cap, ()))
+        return [self._agent_ids[index] for index in sorted(positions)]
     
     def _can_provide_support(self, agent, need: str) -> bool:
         """Check if this agent can provide the requested support"""
-        capability_map = {
-            'protection': ['emergency_response', 'security'],
-            'drainage': ['pumping', 'emergency_response'],
-            'power': ['electricity', 'power_distribution'],
-            'medical_care': ['medical_care', 'emergency_treatment'],
-            'evacuation': ['evacuation_route', 'mobility']
-        }
-        
-        required_caps = capability_map.get(need, [need])
-        return any(cap in agent.capabilities for cap in required_caps)
+        return not self._capability_sets[agent.agent_id].isdisjoint(_SUPPORT_CAPABILITIES.get(need, (need,)))
     
     def generate_cascade_message_with_llm(self, sender_agent, intent: str, target: str, need: str = None):
         """Generate cascade message with LLM content + structured payload"""
@@ -132,27 +244,117 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
             # Fallback to structured message without LLM content
             return self.generate_structured_message(sender_agent, intent, target, need)
         
-        try:
-            # Generate LLM-enhanced message
-            enhanced_msg = sender_agent.generate_enhanced_message(
-                intent, target, self.current_tick, self.flood_stage, 
-                self.llm_generator, need
-            )
-            
-            # Add cascade-specific payload data
-            enhanced_msg.payload.update({
-                'cascade_context': {
-                    'active_events': list(self.active_events),
-                    'system_states': copy.deepcopy(self.system_states),
-                    'flood_stage': self.flood_stage
-                }
+        # The same agent saying the same thing to the same recipient in the same situation reuses its
+        # earlier content (the prompt names the recipient; broadcasts all share target 'broadcast')
+        content_key = (sender_agent.agent_id, intent, sender_agent.status, self.flood_stage, need, target)
+        enhanced_msg = sender_agent.build_enhanced_message(
+            intent, target, self.current_tick, self.flood_stage,
+            self.llm_generator.get_cached_content(content_key), need
+        )
+        
+        # Add cascade-specific payload data
+        enhanced_msg.payload.update({
+            'cascade_context': self._cascade_context
+        })
+        
+        if enhanced_msg.content is None:
+            pending = self._pending_llm_content.get(content_key)
+            if pending is not None:
+                pending[0].append(enhanced_msg)
+            else:
+                # Prompt is built now, from the sender's current state; content is filled by flush_llm_content
+                prompt = self.llm_generator.build_agent_message_prompt(
+                    sender_agent, intent, target, self.current_tick, self.flood_stage, need
+                )
+                self._pending_llm_content[content_key] = (
+                    [enhanced_msg], prompt, self._structured_content(sender_agent, intent, need)
+                )
+        return enhanced_msg
+    
+    async def flush_llm_content(self):
+        """Generate content for every message created since the last flush
+        
+        Several messages share each LLM request, and the requests of a tick run concurrently.
+        """
+        
+        pending = [(key, messages, prompt, fallback)
+                   for key, (messages, prompt, fallback) in self._pending_llm_content.items()]
+        self._pending_llm_content = {}
+        
+        chunks = [pending[start:start + self.llm_messages_per_call]
+                  for start in range(0, len(pending), self.llm_messages_per_call)]
+        
+        if self.batch_mode:
+            self._record_batch_chunks(chunks)
+            return
+        
+        # All requests are submitted before any result is awaited
+        results = await asyncio.gather(
+            *(self.llm_generator.agenerate_message_contents([prompt for _, _, prompt, _ in chunk]) for chunk in chunks),
+            return_exceptions=True
+        )
+        
+        for chunk, contents in zip(chunks, results):
+            self._fill_chunk_content(chunk, contents)
+        self._fill_pattern_records()
+    
+    def _record_batch_chunks(self, chunks: List[List[Tuple[Tuple, List[EnhancedMessage], str, str]]]):
+        """Queue a tick's content requests as Batch API input lines; content stays empty until the batch completes"""
+        for index, chunk in enumerate(chunks):
+            custom_id = f"{self.current_tick}:{index}"
+            self._batch_chunks[custom_id] = chunk
+            self._batch_lines.append({
+                'custom_id': custom_id,
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': self.llm_generator._batch_request([prompt for _, _, prompt, _ in chunk])
             })
-            
-            return enhanced_msg
-            
-        except Exception as e:
-            logger.warning(f"LLM generation failed for {sender_agent.agent_id}: {e}")
-            return self.generate_structured_message(sender_agent, intent, target, need)
+    
+    async def complete_content_batch(self, scenario_name: str):
+        """Run the recorded requests as one batch and fill the content of every message"""
+        
+        batch_lines, chunks = self._batch_lines, self._batch_chunks
+        self._batch_lines, self._batch_chunks = [], {}
+        
+        logger.info(f"Submitting {len(batch_lines)} LLM content requests as a batch")
+        responses = await self.llm_generator.arun_batch(
+            batch_lines, f"llm_cascade_batch_{scenario_name}.jsonl", self.batch_poll_interval
+        )
+        logger.info(f"Loaded {len(responses)}/{len(batch_lines)} batch responses")
+        
+        for custom_id, chunk in chunks.items():
+            try:
+                if custom_id not in responses:
+                    raise RuntimeError(f"no batch response for request {custom_id}")
+                contents = self.llm_generator._split_batch_response(responses[custom_id], len(chunk))
+            except RuntimeError as e:
+                contents = e
+            self._fill_chunk_content(chunk, contents)
+        self._fill_pattern_records()
+    
+    def _fill_chunk_content(self, chunk: List[Tuple[Tuple, List[EnhancedMessage], str, str]], contents):
+        if isinstance(contents, Exception):
+            logger.warning(f"LLM generation failed for {len(chunk)} messages: {contents}")
+            contents = [fallback for _, _, _, fallback in chunk]
+        else:
+            for (key, _, _, _), content in zip(chunk, contents):
+                self.llm_generator.cache_content(key, content)
+        
+        for (_, messages, _, _), content in zip(chunk, contents):
+            for message in messages:
+                message.content = content
+    
+    def _fill_pattern_records(self):
+        for message, pattern in self._unfilled_pattern_samples:
+            pattern['sample_content'] = message.content
+        self._unfilled_pattern_samples = []
+    
+    @staticmethod
+    def _structured_content(sender_agent, intent: str, need: str = None) -> str:
+        content = f"{sender_agent.place_name} {intent}: {sender_agent.status}"
+        if need:
+            content += f" - requesting {need}"
+        return content
     
     def generate_structured_message(self, sender_agent, intent: str, target: str, need: str = None):
         """Generate structured message without LLM (fallback)"""
@@ -165,20 +367,14 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
             'capabilities': sender_agent.capabilities,
             'status': sender_agent.status,
             'place_name': sender_agent.place_name,
-            'cascade_context': {
-                'active_events': list(self.active_events),
-                'system_states': copy.deepcopy(self.system_states),
-                'flood_stage': self.flood_stage
-            }
+            'cascade_context': self._cascade_context
         }
         
         if need:
             payload['need'] = need
         
         # Generate basic content
-        content = f"{sender_agent.place_name} {intent}: {sender_agent.status}"
-        if need:
-            content += f" - requesting {need}"
+        content = self._structured_content(sender_agent, intent, need)
         
         return EnhancedMessage(
             sender=sender_agent.agent_id,
@@ -189,16 +385,22 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
             payload=payload
         )
     
-    def process_agent_turn_with_llm(self, agent, p_fail: float, equity_weighting: float = 0.0):
-        """Process agent turn with LLM-enhanced message generation"""
+    def process_agent_turn_with_llm(self, agent, p_fail: float, equity_weighting: float = 0.0,
+                                    new_status: str = None, broadcast: bool = None):
+        """Process agent turn with LLM-enhanced message generation
+        
+        new_status and broadcast come from the tick's status pass; without them they are
+        worked out for this agent alone.
+        """
         
         # Update status based on flood stage
-        new_status = agent.get_current_status(self.flood_stage)
-        status_changed = new_status != agent.status
+        if new_status is None:
+            new_status = agent.get_current_status(self.flood_stage)
+            broadcast = new_status != agent.status and agent.needs_to_broadcast(new_status)
         agent.status = new_status
         
         # Generate status update with LLM content
-        if status_changed and agent.needs_to_broadcast(new_status):
+        if broadcast:
             msg = self.generate_cascade_message_with_llm(
                 agent, 'status_update', 'broadcast'
             )
@@ -222,26 +424,27 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
             
             agent.last_update_tick = self.current_tick
         
-        # Process incoming messages (enhanced)
-        priority_queue = sorted(agent.message_queue,
-                               key=lambda m: self.get_message_priority(m, equity_weighting),
-                               reverse=True)
+        # Process incoming messages (enhanced) - the 10 highest priority, ties in arrival order
+        priority_queue = nlargest(10, self._drain_inbox(agent),
+                                  key=lambda m: self._cached_message_priority(m, equity_weighting))
         
-        for message in priority_queue[:10]:
+        for message in priority_queue:
             self.process_enhanced_message(agent, message, p_fail)
         
-        agent.message_queue = []
-        
         # Update unmet needs
-        if new_status in ['critical', 'emergency']:
-            base_needs = agent.needs.copy()
-            if new_status == 'emergency':
-                base_needs.extend(['evacuation', 'emergency_response'])
-            
-            for need in base_needs:
-                if need not in [r['need'] for r in agent.pending_requests]:
-                    if need not in agent.unmet_needs:
-                        agent.unmet_needs.append(need)
+        status_needs = self._status_needs[agent.agent_id].get(new_status)
+        if status_needs:
+            requested = {r['need'] for r in agent.pending_requests}
+            for need in status_needs:
+                if need not in requested and need not in agent.unmet_needs:
+                    agent.unmet_needs.append(need)
+    
+    def _cached_message_priority(self, message, equity_weighting: float) -> float:
+        key = (message.intent, message.sender, equity_weighting)
+        priority = self._priority_cache.get(key)
+        if priority is None:
+            priority = self._priority_cache[key] = self.get_message_priority(message, equity_weighting)
+        return priority
     
     def process_enhanced_message(self, receiver_agent, message, p_fail: float):
         """Process enhanced message with LLM content analysis"""
@@ -290,20 +493,25 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
         
         pattern_key = f"{message.payload.get('sector', 'unknown')}_{message.intent}"
         
-        if pattern_key not in self.communication_patterns:
-            self.communication_patterns[pattern_key] = {
-                'messages': [],
+        pattern = self.communication_patterns.get(pattern_key)
+        if pattern is None:
+            # One column per record field; only the first message's content is kept
+            pattern = self.communication_patterns[pattern_key] = {
+                'success': array('b'),
+                'sender_vulnerability': array('d'),
+                'tick': array('i'),
+                'sample_content': message.content,
                 'success_rate': 0,
                 'response_times': [],
                 'content_analysis': {}
             }
+            if message.content is None:
+                # Sent this tick, content arrives with the end-of-tick flush (or the batch)
+                self._unfilled_pattern_samples.append((message, pattern))
         
-        self.communication_patterns[pattern_key]['messages'].append({
-            'content': message.content,
-            'success': message.success,
-            'sender_vulnerability': message.payload.get('vulnerability', 0),
-            'tick': message.tick
-        })
+        pattern['success'].append(bool(message.success))
+        pattern['sender_vulnerability'].append(message.payload.get('vulnerability', 0))
+        pattern['tick'].append(message.tick)
     
     def send_enhanced_cascade_message(self, message: EnhancedMessage, p_fail: float):
         """Send enhanced message with cascade effects"""
@@ -312,29 +520,162 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
         if random.random() < p_fail:
             message.success = False
         
-        # Deliver to recipients
+        # Deliver to recipients - broadcasts go to the shared broadcast log, read by every agent
         if message.receiver == 'broadcast':
-            for agent_id, agent in self.agents.items():
-                if agent_id != message.sender:
-                    agent.message_queue.append(message)
+            self._broadcasts.append(message)
         else:
             if message.receiver in self.agents:
                 self.agents[message.receiver].message_queue.append(message)
+                # Broadcasts logged before this message, to keep arrival order when merging
+                self._direct_marks[message.receiver].append(self._broadcast_offset + len(self._broadcasts))
             else:
                 message.success = False
         
-        # Store in both logs
-        self.enhanced_message_log.append(message)
-        # Also store in regular message log for cascade analysis compatibility
-        self.message_log.append(message)
+        # Full message goes to the NDJSON log once its content is filled in
+        self._unlogged_messages.append(message)
+        self._tick_message_count += 1
+        # Slim copy in the regular message log for the base delivery/response time analysis
+        need = message.payload.get('need')
+        self.message_log.append(Message(
+            sender=message.sender,
+            receiver=message.receiver,
+            tick=message.tick,
+            intent=message.intent,
+            payload={'need': need} if need is not None else {},
+            success=message.success
+        ))
+    
+    def _reset_broadcasts(self):
+        """Empty the broadcast log; each agent reads it from a cursor at its own turn"""
+        self._broadcasts: List[EnhancedMessage] = []
+        self._broadcast_offset = 0  # Log index of self._broadcasts[0] - read entries are trimmed
+        self._broadcast_cursors = dict.fromkeys(self.agents, 0)
+        self._direct_marks: Dict[str, List[int]] = {agent_id: [] for agent_id in self.agents}
+    
+    def _trim_broadcasts(self):
+        """Drop broadcasts every agent has already read"""
+        read = min(self._broadcast_cursors.values(), default=self._broadcast_offset + len(self._broadcasts))
+        del self._broadcasts[:read - self._broadcast_offset]
+        self._broadcast_offset = read
+    
+    def _drain_inbox(self, agent) -> List[EnhancedMessage]:
+        """Take the agent's incoming messages in arrival order: its direct queue interleaved
+        with other agents' broadcasts since its last turn"""
+        
+        agent_id = agent.agent_id
+        offset = self._broadcast_offset
+        position = self._broadcast_cursors[agent_id]
+        inbox = []
+        for message, mark in zip(agent.message_queue, self._direct_marks[agent_id]):
+            inbox.extend(m for m in self._broadcasts[position - offset:mark - offset] if m.sender != agent_id)
+            inbox.append(message)
+            position = max(position, mark)
+        inbox.extend(m for m in self._broadcasts[position - offset:] if m.sender != agent_id)
+        
+        self._broadcast_cursors[agent_id] = offset + len(self._broadcasts)
+        agent.message_queue = []
+        self._direct_marks[agent_id] = []
+        return inbox
+    
+    def take_cascade_snapshot(self):
+        """Cascade snapshot, reducing the one it supersedes to the agents that changed
+        
+        The first and the latest snapshot of a run list every agent; each snapshot in between
+        keeps only agents whose state differs from the snapshot before it ('agents_delta').
+        """
+        super().take_cascade_snapshot()
+        if len(self.tick_snapshots) >= 2:
+            previous = self.tick_snapshots[-2]
+            full_states = previous['agents']
+            if len(self.tick_snapshots) > 2:
+                previous['agents'] = {agent_id: state for agent_id, state in full_states.items()
+                                      if state != self._snapshot_base[agent_id]}
+                previous['agents_delta'] = True
+            self._snapshot_base = full_states
+    
+    @staticmethod
+    def expand_snapshot_deltas(snapshots: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Full per-tick snapshots from saved delta snapshots"""
+        expanded = []
+        agents = {}
+        for snapshot in snapshots:
+            agents = {**agents, **snapshot['agents']} if snapshot.get('agents_delta') else snapshot['agents']
+            expanded.append({**{k: v for k, v in snapshot.items() if k != 'agents_delta'}, 'agents': agents})
+        return expanded
+    
+    def agent_queue_length(self, agent) -> int:
+        # Outside an agent's own turn every unread broadcast is from another agent
+        unread = self._broadcast_offset + len(self._broadcasts) - self._broadcast_cursors[agent.agent_id]
+        return len(agent.message_queue) + unread
+    
+    def _reset_message_aggregates(self):
+        self._total_enhanced_messages = 0
+        self._tick_message_count = 0
+        # sector -> {'success', 'total', 'contents' (first 3)}; place -> {'count', 'words', 'sample'}
+        self._sector_stats: Dict[str, Dict[str, Any]] = {}
+        self._place_stats: Dict[str, Dict[str, Any]] = {}
+        self._payload_sectors: Set[Any] = set()
+    
+    def stream_message_log(self):
+        """Write messages whose content is complete to the NDJSON log and fold them into the aggregates"""
+        
+        messages = self._unlogged_messages
+        self._unlogged_messages = []
+        
+        if self._message_stream is not None:
+            # Shared cascade contexts serialise as dicts
+            self._message_stream.writelines(json.dumps(msg.to_dict(), default=dict) + '\n' for msg in messages)
+        
+        self._total_enhanced_messages += len(messages)
+        for msg in messages:
+            sector = msg.payload.get('sector', 'unknown')
+            self._payload_sectors.add(msg.payload.get('sector'))
+            sector_stats = self._sector_stats.get(sector)
+            if sector_stats is None:
+                sector_stats = self._sector_stats[sector] = {'success': 0, 'total': 0, 'contents': []}
+            sector_stats['total'] += 1
+            if msg.success:
+                sector_stats['success'] += 1
+            if len(sector_stats['contents']) < 3:
+                sector_stats['contents'].append(msg.content)
+            
+            place = msg.payload.get('place_name', 'unknown')
+            place_stats = self._place_stats.get(place)
+            if place_stats is None:
+                place_stats = self._place_stats[place] = {'count': 0, 'words': 0, 'sample': msg.content}
+            place_stats['count'] += 1
+            place_stats['words'] += len(msg.content.split())
     
     def run_llm_cascade_scenario(self, scenario_name: str, max_ticks: int = 120, **scenario_params):
         """Run cascade scenario with LLM-enhanced messages"""
+        return asyncio.run(self.arun_llm_cascade_scenario(scenario_name, max_ticks, **scenario_params))
+    
+    async def arun_llm_cascade_scenario(self, scenario_name: str, max_ticks: int = 120, **scenario_params):
+        """Async scenario loop - each tick's LLM content requests run concurrently on one event loop"""
         
+        self._message_stream = open(f"llm_cascade_log_{scenario_name}.ndjson", 'w', buffering=1 << 20)
+        try:
+            if not self.llm_generator:
+                return await self._run_llm_cascade_ticks(scenario_name, max_ticks, **scenario_params)
+            
+            self.llm_generator.open_session()
+            try:
+                return await self._run_llm_cascade_ticks(scenario_name, max_ticks, **scenario_params)
+            finally:
+                await self.llm_generator.close_session()
+        finally:
+            self._message_stream.close()
+            self._message_stream = None
+    
+    async def _run_llm_cascade_ticks(self, scenario_name: str, max_ticks: int, **scenario_params):
         logger.info(f"Starting LLM-enhanced cascade scenario: {scenario_name}")
         
         # Reset simulation
         self.reset_simulation()
+        self._load_status_array()
+        self._unlogged_messages = []
+        self._reset_message_aggregates()
+        self._reset_broadcasts()
         
         # Create cascade events (same as base framework)
         self.cascade_events = self.create_scenario_events(scenario_name)
@@ -344,6 +685,8 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
         # Run simulation with LLM enhancement
         for tick in range(max_ticks):
             self.current_tick = tick
+            self._tick_message_count = 0
+            self._trim_broadcasts()
             
             # Apply cascade events
             events_to_trigger = [e for e in self.cascade_events
@@ -362,6 +705,11 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
             
             # Update flood stage
             self.update_flood_progression(tick, max_ticks)
+            self.snapshot_cascade_context()
+            
+            # Status transitions and broadcast decisions for every agent at once
+            status_codes, needs_broadcast = self._update_status_arrays()
+            status_names = self._status_names
             
             # Process agent turns with LLM enhancement
             agent_order = list(self.agents.keys())
@@ -369,8 +717,15 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
             
             for agent_id in agent_order:
                 agent = self.agents[agent_id]
+                index = self._agent_index[agent_id]
                 p_fail = self.calculate_agent_failure_probability(agent)
-                self.process_agent_turn_with_llm(agent, p_fail, scenario_params.get('equity_weighting', 0.0))
+                self.process_agent_turn_with_llm(agent, p_fail, scenario_params.get('equity_weighting', 0.0),
+                                                 status_names[status_codes[index]], bool(needs_broadcast[index]))
+            
+            if self.llm_generator:
+                await self.flush_llm_content()
+            if not (self.llm_generator and self.batch_mode):
+                self.stream_message_log()
             
             # Take snapshot
             self.take_cascade_snapshot()
@@ -378,8 +733,11 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
             # Log progress
             if tick % 20 == 0:
                 active_events = len(self.active_events)
-                total_messages = len([m for m in self.enhanced_message_log if m.tick == tick])
-                logger.info(f"Tick {tick}: {active_events} active events, {total_messages} LLM messages")
+                logger.info(f"Tick {tick}: {active_events} active events, {self._tick_message_count} LLM messages")
+        
+        if self.llm_generator and self.batch_mode:
+            await self.complete_content_batch(scenario_name)
+            self.stream_message_log()
         
         # Generate results with dual analysis
         results = self.get_llm_cascade_results()
@@ -395,7 +753,7 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
         
         # Add LLM-specific analysis
         enhanced_results = {
-            'total_enhanced_messages': len(self.enhanced_message_log),
+            'total_enhanced_messages': self._total_enhanced_messages,
             'communication_patterns': self.analyze_communication_patterns(),
             'content_effectiveness': self.analyze_content_effectiveness(),
             'place_voice_analysis': self.analyze_place_voices(),
@@ -410,11 +768,11 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
         analysis = {}
         
         for pattern_key, data in self.communication_patterns.items():
-            if data['messages']:
+            if data['success']:
                 analysis[pattern_key] = {
-                    'message_count': len(data['messages']),
-                    'avg_success_rate': np.mean([m['success'] for m in data['messages']]),
-                    'sample_content': data['messages'][0]['content'][:100] if data['messages'] else ""
+                    'message_count': len(data['success']),
+                    'avg_success_rate': np.frombuffer(data['success'], dtype=np.int8).mean(),
+                    'sample_content': data['sample_content'][:100]
                 }
         
         return analysis
@@ -422,20 +780,8 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
     def analyze_content_effectiveness(self) -> Dict[str, Any]:
         """Analyze which content types are most effective"""
         
-        # Group messages by sector and intent
-        by_sector = {}
-        for msg in self.enhanced_message_log:
-            sector = msg.payload.get('sector', 'unknown')
-            if sector not in by_sector:
-                by_sector[sector] = {'success': 0, 'total': 0, 'contents': []}
-            
-            by_sector[sector]['total'] += 1
-            if msg.success:
-                by_sector[sector]['success'] += 1
-            by_sector[sector]['contents'].append(msg.content)
-        
         effectiveness = {}
-        for sector, data in by_sector.items():
+        for sector, data in self._sector_stats.items():
             effectiveness[sector] = {
                 'success_rate': data['success'] / data['total'] if data['total'] > 0 else 0,
                 'message_count': data['total'],
@@ -447,19 +793,12 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
     def analyze_place_voices(self) -> Dict[str, Any]:
         """Analyze distinct place voice characteristics"""
         
-        by_place = {}
-        for msg in self.enhanced_message_log:
-            place = msg.payload.get('place_name', 'unknown')
-            if place not in by_place:
-                by_place[place] = []
-            by_place[place].append(msg.content)
-        
         voice_analysis = {}
-        for place, contents in list(by_place.items())[:10]:  # Top 10 places
+        for place, data in list(self._place_stats.items())[:10]:  # Top 10 places
             voice_analysis[place] = {
-                'message_count': len(contents),
-                'sample_voice': contents[0] if contents else "",
-                'avg_length': np.mean([len(c.split()) for c in contents]) if contents else 0
+                'message_count': data['count'],
+                'sample_voice': data['sample'],
+                'avg_length': data['words'] / data['count']
             }
         
         return voice_analysis
@@ -468,28 +807,25 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
         """Correlate message content with cascade success"""
         
         # Find relationships between content characteristics and outcomes
-        heritage_msgs = [m for m in self.enhanced_message_log if m.payload.get('sector') == 'heritage']
-        transport_msgs = [m for m in self.enhanced_message_log if m.payload.get('sector') == 'transport']
+        heritage = self._sector_stats.get('heritage')
+        transport = self._sector_stats.get('transport')
         
         return {
-            'heritage_effectiveness': np.mean([m.success for m in heritage_msgs]) if heritage_msgs else 0,
-            'transport_effectiveness': np.mean([m.success for m in transport_msgs]) if transport_msgs else 0,
-            'total_sectors_compared': len(set(m.payload.get('sector') for m in self.enhanced_message_log))
+            'heritage_effectiveness': heritage['success'] / heritage['total'] if heritage else 0,
+            'transport_effectiveness': transport['success'] / transport['total'] if transport else 0,
+            'total_sectors_compared': len(self._payload_sectors)
         }
     
     def save_llm_cascade_results(self, scenario_name: str):
         """Save enhanced results with both cascade and communication data"""
         
-        # Save enhanced message log
+        # Enhanced message log was streamed during the run
         enhanced_log_file = f"llm_cascade_log_{scenario_name}.ndjson"
-        with open(enhanced_log_file, 'w') as f:
-            for msg in self.enhanced_message_log:
-                f.write(json.dumps(msg.to_dict()) + '\n')
         
         # Save communication patterns analysis
         patterns_file = f"communication_patterns_{scenario_name}.json"
         with open(patterns_file, 'w') as f:
-            json.dump(self.communication_patterns, f, indent=2)
+            json.dump(self.communication_patterns, f, indent=2, default=list)  # Columns serialise as lists
         
         # Save cascade snapshots (same as base)
         snapshot_file = f"llm_cascade_snapshots_{scenario_name}.json"
@@ -503,8 +839,25 @@ class LLMCascadeSimulation(FixedMultiHazardSimulation):
         
         logger.info(f"LLM cascade results saved: {enhanced_log_file}, {patterns_file}")
 
-def run_llm_cascade_demonstration():
-    """Run cascade scenarios with LLM enhancement"""
+def _run_llm_cascade_scenario_job(scenario: str, max_ticks: int, batch_mode: bool, seed: int) -> Dict[str, Any]:
+    """Run and save one scenario in its own simulation - worker process entry point
+    
+    Forked workers inherit the parent's random state, so each scenario seeds its own
+    stream from the run seed and its name.
+    """
+    random.seed(f"{seed}:{scenario}")
+    sim = LLMCascadeSimulation(batch_mode=batch_mode)
+    results = sim.run_llm_cascade_scenario(scenario, max_ticks=max_ticks)
+    sim.save_llm_cascade_results(scenario)
+    return results
+
+def run_llm_cascade_demonstration(batch_mode: bool = False, seed: int = None):
+    """Run cascade scenarios with LLM enhancement
+    
+    batch_mode sends message content through the OpenAI Batch API (half price, results
+    within 24h) - for offline report generation. seed makes the run reproducible; by
+    default one is drawn from random.
+    """
     
     print("=== LLM-ENHANCED CASCADE DEMONSTRATION ===")
     
@@ -515,19 +868,26 @@ def run_llm_cascade_demonstration():
     else:
         print("✅ OpenAI API key found - enabling LLM content generation")
     
-    sim = LLMCascadeSimulation()
     results = {}
     
     scenarios = ["ransomware_flood", "communication_breakdown"]  # Start with 2 scenarios
     
-    print(f"Running {len(scenarios)} LLM-enhanced cascade scenarios...")
+    if seed is None:
+        seed = random.getrandbits(64)
+    print(f"Running {len(scenarios)} LLM-enhanced cascade scenarios in parallel (seed {seed})...")
+    
+    # Scenarios are independent - each runs in its own process; all are submitted before collecting
+    with ProcessPoolExecutor(max_workers=len(scenarios)) as executor:
+        futures = {
+            scenario: executor.submit(_run_llm_cascade_scenario_job, scenario, 60, batch_mode, seed)  # Shorter for testing
+            for scenario in scenarios
+        }
     
-    for scenario in scenarios:
-        print(f"\n--- Running LLM-Enhanced {scenario.upper().replace('_', ' ')} ---")
+    for scenario, future in futures.items():
+        print(f"\n--- LLM-Enhanced {scenario.upper().replace('_', ' ')} ---")
         
         try:
-            results[scenario] = sim.run_llm_cascade_scenario(scenario, max_ticks=60)  # Shorter for testing
-            sim.save_llm_cascade_results(scenario)
+            results[scenario] = future.result()
             
             # Print results
             r = results[scenario]
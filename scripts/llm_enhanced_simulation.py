@@ -7,26 +7,88 @@ Hybrid approach: structured intents + dynamic content generation
 import json
 import random
 import os
+import re
+import asyncio
+import logging
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict, deque
 from pathlib import Path
+import numpy as np
+import httpx
 import openai
 from dotenv import load_dotenv
+from llm_parallel import AsyncTokenBucket, create_with_retries
 
-# Load environment variables - explicitly specify .env file path
+# Load environment variables once - explicitly specify .env file path (existing variables win)
 load_dotenv(dotenv_path='.env')
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
-# Debug: Verify environment loading
-import sys
-if not os.getenv('OPENAI_API_KEY'):
-    print("DEBUG: .env not loaded properly")
-    # Try loading from current directory
-    load_dotenv(dotenv_path=Path('.env'))
-    if not os.getenv('OPENAI_API_KEY'):
-        print("DEBUG: Still no API key found")
-        sys.exit(1)
-
-@dataclass
+logger = logging.getLogger(__name__)
+
+class MalformedBatchResponse(RuntimeError):
+    """A multi-message answer that does not contain every requested MESSAGE n block"""
+
+# Splits a multi-message answer into its MESSAGE n blocks
+_MESSAGE_BLOCK_RE = re.compile(r'MESSAGE\s*(\d+)\s*:')
+
+# Completion budget per message - three short sentences fit in about 60 tokens
+_MESSAGE_MAX_TOKENS = 100
+
+# Short answers come back in seconds; a stalled connect or response should not hold up a tick
+_REQUEST_TIMEOUT = httpx.Timeout(20.0, connect=5.0)
+
+# Static instructions live in the system prompt; each request carries only the agent's compact context
+_MESSAGE_INSTRUCTIONS = """Each request describes the agent you speak for, its situation (flood stage 0=normal to 3=emergency),
+your intent and your recipient.
+Write a short message (1–3 sentences) in natural language that matches the intent:
+- If status_update: describe current condition, risk level, or impact.
+- If request_support: specify what help you need and why.
+- If commit: confirm you can provide help and what you will do.
+- If reject: state you cannot help and give a short reason."""
+
+_FLOOD_IMPACT_LEVELS = {
+    0: 'monitoring',
+    1: 'water_approaching',
+    2: 'partial_flooding',
+    3: 'severe_flooding'
+}
+
+# Routine message wording by (intent, flood impact) - used instead of the LLM below flood stage 3
+_ROUTINE_MESSAGE_TEMPLATES = {
+    ('status_update', 'monitoring'): "{place_name} ({sector}) reports status {status}: no water on site yet, monitoring levels.",
+    ('status_update', 'water_approaching'): "{place_name} ({sector}) is {status}: water is approaching and we are preparing for flooding.",
+    ('status_update', 'partial_flooding'): "{place_name} ({sector}) is {status}: partial flooding on site, operations are affected.",
+    ('request_support', 'monitoring'): "{place_name} asks {target} for {need} support as a precaution - please confirm availability.",
+    ('request_support', 'water_approaching'): "{place_name} needs {need} support from {target} before the water arrives - can you assist?",
+    ('request_support', 'partial_flooding'): "{place_name} is partially flooded and needs {need} from {target} - please respond urgently."
+}
+
+# Status codes used by the per-tick status pass; statuses outside this list get codes on first use
+_STATUS_NAMES = ('normal', 'alert', 'critical', 'emergency')
+# Statuses that warrant status updates and support requests
+_URGENT_STATUS_CODES = (2, 3)
+
+# Partner capabilities that cover each need
+_SUPPORT_CAPABILITY_MAP = {
+    'evacuation': ['evacuation_route', 'mobility', 'emergency_response'],
+    'power': ['electricity', 'power_distribution'],
+    'medical_care': ['medical_care', 'emergency_treatment'],
+    'protection': ['emergency_response', 'security']
+}
+
+def _agent_prompt_header(agent_data: Dict) -> str:
+    """Prompt line fixed for an agent"""
+    return (f"Agent: {agent_data['place_name']} | role={agent_data['sector']} | "
+            f"vulnerability={agent_data['vulnerability']} | exposure={agent_data['exposure']} | "
+            f"capabilities={','.join(agent_data['capabilities'])}\n")
+
+def _message_prompt(header: str, unmet_needs, status: str, intent: str, target: str,
+                    flood_stage: int, need: str = None) -> str:
+    return (f"{header}status={status} | unmet_needs={','.join(unmet_needs) or 'none'} | flood_stage={flood_stage}/3\n"
+            f"intent={intent} | recipient={target}{f' | need={need}' if need else ''}")
+
+@dataclass(slots=True)
 class EnhancedMessage:
     """Message with LLM-generated content"""
     sender: str
@@ -51,46 +113,112 @@ class EnhancedMessage:
 class LLMMessageGenerator:
     """Generate realistic message content using OpenAI API"""
     
-    def __init__(self):
-        self.client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    def __init__(self, max_concurrency: int = 8, cache_size: int = 4096, use_templates: bool = False):
+        if not OPENAI_API_KEY:
+            # NO FALLBACK - message content must come from the API
+            raise RuntimeError("OPENAI_API_KEY is not set in the environment or .env")
+        self.client = openai.OpenAI(api_key=OPENAI_API_KEY, timeout=_REQUEST_TIMEOUT, max_retries=2)
+        # Small model for routine chatter, larger one for status reports at the flood peak
+        self.message_model = os.getenv('LLM_MESSAGE_MODEL', 'gpt-4o-mini')
+        self.fidelity_model = os.getenv('LLM_FIDELITY_MODEL', 'gpt-4o')
+        # Async client for concurrent batch requests - created per run by open_session()
+        self.max_concurrency = max_concurrency
+        self.async_client = None
+        self._request_slots = None
+        # Account rate limits, enforced client-side so concurrent ticks do not trigger 429 storms
+        self.requests_per_minute = float(os.getenv('LLM_RPM', '500'))
+        self.tokens_per_minute = float(os.getenv('LLM_TPM', '200000'))
+        self.max_attempts = 6
+        self._request_budget = None
+        self._token_budget = None
+        self._jitter = random.Random()  # Keeps backoff off the simulation's seeded RNG
+        self._agent_prompt_headers: Dict[str, str] = {}
+        # LRU cache of generated content keyed on the message features that drive it (0 disables)
+        self.cache_size = cache_size
+        self.response_cache: OrderedDict = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Opt-in: routine messages (below flood stage 3, not in emergency) use fixed wording instead of the LLM
+        self.use_templates = use_templates
+        self.template_hits = 0
         self.system_prompt = """You are simulating communications during a cascading flood in Venice. 
 You control different agents (places, assets, communities, infrastructure). 
 Each agent speaks in short, urgent messages, reporting its situation and needs. 
 Never invent new places: only use the attributes provided.
-Keep messages concise (1-3 sentences), urgent, and context-specific."""
+Keep messages concise (1-3 sentences), urgent, and context-specific.
+
+""" + _MESSAGE_INSTRUCTIONS
+    
+    def compile_agent_prompts(self, agents: Dict[str, Any]):
+        """Pre-format each agent's fixed prompt header (place, role, location, attributes)"""
+        self._agent_prompt_headers = {
+            agent_id: _agent_prompt_header(agent.to_dict()) for agent_id, agent in agents.items()
+        }
+    
+    def build_message_prompt(self, agent_data: Dict, intent: str, target: str,
+                             tick: int, flood_stage: int, need: str = None) -> str:
+        """Agent context prompt for one message - the tick is not part of the prompt"""
+        return _message_prompt(_agent_prompt_header(agent_data), agent_data.get('unmet_needs', []),
+                               agent_data.get('status', 'unknown'), intent, target, flood_stage, need)
+    
+    def build_agent_message_prompt(self, agent: 'EnhancedVeniceAgent', intent: str, target: str,
+                                   tick: int, flood_stage: int, need: str = None) -> str:
+        """build_message_prompt for an agent, reusing its compiled header"""
+        header = self._agent_prompt_headers.get(agent.agent_id)
+        if header is None:
+            return self.build_message_prompt(agent.to_dict(), intent, target, tick, flood_stage, need)
+        return _message_prompt(header, agent.unmet_needs, agent.status, intent, target, flood_stage, need)
+    
+    def message_model_for(self, intent: str, flood_stage: int) -> str:
+        return self.fidelity_model if intent == 'status_update' and flood_stage == 3 else self.message_model
+    
+    def _message_request(self, context_prompt: str, model: str) -> Dict[str, Any]:
+        """Chat completion request for one message"""
+        return {
+            'model': model,
+            'messages': [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": context_prompt}
+            ],
+            'temperature': 0.7,
+            'max_tokens': _MESSAGE_MAX_TOKENS
+        }
+    
+    def prepare_batch_request(self, custom_id: str, context_prompt: str, model: str) -> Dict[str, Any]:
+        """Batch API input line for one message"""
+        return {
+            'custom_id': custom_id,
+            'method': 'POST',
+            'url': '/v1/chat/completions',
+            'body': self._message_request(context_prompt, model)
+        }
+    
+    def maybe_template(self, place_name: str, sector: str, status: str, intent: str, target: str,
+                       flood_stage: int, need: str = None) -> Optional[str]:
+        """Fixed wording for a routine message, or None when it needs the LLM"""
+        if not self.use_templates or flood_stage >= 3 or status == 'emergency':
+            return None
+        template = _ROUTINE_MESSAGE_TEMPLATES.get((intent, _FLOOD_IMPACT_LEVELS.get(flood_stage)))
+        if template is None:
+            return None
+        self.template_hits += 1
+        return template.format(place_name=place_name, sector=sector, status=status, target=target, need=need)
     
     def generate_message_content(self, agent_data: Dict, intent: str, target: str, 
                                 tick: int, flood_stage: int, need: str = None) -> str:
         """Generate LLM content for a message"""
         
+        content = self.maybe_template(agent_data['place_name'], agent_data['sector'],
+                                      agent_data.get('status', 'unknown'), intent, target, flood_stage, need)
+        if content is not None:
+            return content
+        
         # Build agent context
-        context_prompt = f"""You are the agent representing: {agent_data['place_name']}, role={agent_data['sector']}.
-Location: {agent_data['coordinates']}.
-Attributes: vulnerability={agent_data['vulnerability']}, exposure={agent_data['exposure']}, capabilities={agent_data['capabilities']}.
-Current unmet needs: {agent_data.get('unmet_needs', [])}.
-Current status: {agent_data.get('status', 'unknown')}.
-Flood stage: {flood_stage}/3 (0=normal, 3=emergency).
-Simulation tick: {tick}.
-
-Your intent is: {intent}.
-Your recipient is: {target}.
-{f'Specific need you are addressing: {need}' if need else ''}
-
-Write a short message (1–3 sentences) in natural language that matches your intent:
-- If status_update: describe current condition, risk level, or impact.
-- If request_support: specify what help you need and why.
-- If commit: confirm you can provide help and what you will do.
-- If reject: state you cannot help and give a short reason."""
+        context_prompt = self.build_message_prompt(agent_data, intent, target, tick, flood_stage, need)
 
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": context_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=150
+                **self._message_request(context_prompt, self.message_model_for(intent, flood_stage))
             )
             
             content = response.choices[0].message.content.strip()
@@ -99,6 +227,144 @@ Write a short message (1–3 sentences) in natural language that matches your in
         except Exception as e:
             # Log error but do not generate fallback content - require valid LLM API
             raise RuntimeError(f"LLM content generation failed: {e}. No fallback content will be generated.")
+    
+    async def acomplete_message(self, context_prompt: str, model: str) -> str:
+        """One message completion, throttled to max_concurrency requests in flight"""
+        try:
+            return await self._acreate(self._message_request(context_prompt, model))
+        except Exception as e:
+            raise RuntimeError(f"LLM content generation failed: {e}. No fallback content will be generated.")
+    
+    def get_cached_content(self, key: Tuple) -> Optional[str]:
+        """Look up cached content, refreshing its LRU position"""
+        if not self.cache_size:
+            return None
+        content = self.response_cache.get(key)
+        if content is None:
+            self.cache_misses += 1
+            return None
+        self.response_cache.move_to_end(key)
+        self.cache_hits += 1
+        return content
+    
+    def cache_content(self, key: Tuple, content: str):
+        """Store generated content, evicting the least recently used entry when full"""
+        if not self.cache_size:
+            return
+        self.response_cache[key] = content
+        self.response_cache.move_to_end(key)
+        if len(self.response_cache) > self.cache_size:
+            self.response_cache.popitem(last=False)
+    
+    def open_session(self):
+        """Create the async client for a simulation run - must be called inside the run's event loop
+        
+        One pooled HTTP client serves the whole run, keeping a keep-alive connection
+        for every request slot so TLS handshakes are paid once per connection. The
+        client is bound to the run's event loop, so it is not shared across runs.
+        """
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.max_concurrency,
+                                max_keepalive_connections=self.max_concurrency),
+            timeout=_REQUEST_TIMEOUT
+        )
+        # Retries are handled by _acreate so they respect the rate limits
+        self.async_client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client,
+                                               max_retries=0)
+        self._request_slots = asyncio.Semaphore(self.max_concurrency)
+        self._request_budget = AsyncTokenBucket(self.requests_per_minute)
+        self._token_budget = AsyncTokenBucket(self.tokens_per_minute)
+    
+    async def close_session(self):
+        if self.async_client is not None:
+            await self.async_client.close()
+        self.async_client = None
+        self._request_slots = None
+        self._request_budget = None
+        self._token_budget = None
+    
+    async def _acreate(self, request: Dict[str, Any]) -> str:
+        """One chat completion within the RPM/TPM budgets, retrying transient errors with backoff"""
+        return await create_with_retries(self.async_client, request, self._request_slots, self.max_attempts,
+                                         self._jitter, self._request_budget, self._token_budget)
+    
+    def _batch_request(self, prompts: List[str], model: str = None) -> Dict[str, Any]:
+        """Chat completion request asking for one message per prompt, in MESSAGE n blocks"""
+        request_blocks = "\n\n".join(f"MESSAGE {n} REQUEST:\n{prompt}" for n, prompt in enumerate(prompts, 1))
+        batch_prompt = (
+            f"Write one separate message for each of the {len(prompts)} requests below.\n"
+            f"Start each message with 'MESSAGE n:' on its own line, in request order, and write nothing else.\n\n"
+            f"{request_blocks}"
+        )
+        return {
+            'model': model or self.message_model,
+            'messages': [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": batch_prompt}
+            ],
+            'temperature': 0.7,
+            'max_tokens': _MESSAGE_MAX_TOKENS * len(prompts)
+        }
+    
+    @staticmethod
+    def _split_batch_response(text: str, expected: int) -> List[str]:
+        parts = _MESSAGE_BLOCK_RE.split(text)
+        blocks = {int(number): block.strip() for number, block in zip(parts[1::2], parts[2::2])}
+        missing = [n for n in range(1, expected + 1) if not blocks.get(n)]
+        if missing:
+            raise MalformedBatchResponse(f"LLM batch response missing messages {missing}")
+        return [blocks[n] for n in range(1, expected + 1)]
+    
+    async def agenerate_message_contents(self, prompts: List[str], model: str = None) -> List[str]:
+        """Generate several messages in one request, returned in prompt order and throttled to max_concurrency requests in flight"""
+        try:
+            text = await self._acreate(self._batch_request(prompts, model))
+        except Exception as e:
+            raise RuntimeError(f"LLM content generation failed: {e}. No fallback content will be generated.")
+        return self._split_batch_response(text, len(prompts))
+
+    async def arun_batch(self, batch_lines: List[Dict[str, Any]], batch_file: str,
+                         poll_interval: float = 30.0, max_poll_interval: float = 600.0) -> Dict[str, str]:
+        """Submit requests to the OpenAI Batch API, wait for completion and return answers by custom_id
+
+        Polling backs off exponentially from poll_interval up to max_poll_interval.
+        """
+
+        if not batch_lines:
+            return {}
+
+        with open(batch_file, 'w') as f:
+            for line in batch_lines:
+                f.write(json.dumps(line) + '\n')
+
+        with open(batch_file, 'rb') as f:
+            input_file = await self.async_client.files.create(file=f, purpose='batch')
+        batch = await self.async_client.batches.create(
+            input_file_id=input_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h'
+        )
+
+        delay = poll_interval
+        while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_poll_interval)
+            batch = await self.async_client.batches.retrieve(batch.id)
+
+        if batch.status != 'completed' or not batch.output_file_id:
+            raise RuntimeError(f"LLM batch {batch.id} did not complete: {batch.status}")
+
+        responses = {}
+        output = await self.async_client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            response = result.get('response') or {}
+            if response.get('status_code') == 200:
+                responses[result['custom_id']] = response['body']['choices'][0]['message']['content'].strip()
+
+        return responses
 
 class EnhancedVeniceAgent:
     """Enhanced agent with LLM message generation"""
@@ -140,6 +406,11 @@ class EnhancedVeniceAgent:
         content = llm_generator.generate_message_content(
             self.to_dict(), intent, target, tick, flood_stage, need
         )
+        return self.build_enhanced_message(intent, target, tick, flood_stage, content, need)
+    
+    def build_enhanced_message(self, intent: str, target: str, tick: int, flood_stage: int,
+                               content: Optional[str], need: str = None) -> EnhancedMessage:
+        """Assemble the structured message around already generated (or pending) content"""
         
         # Build structured payload
         payload = {
@@ -179,21 +450,28 @@ class EnhancedVeniceAgent:
     
     def get_flood_impact(self, flood_stage: int) -> str:
         """Describe flood impact level for this agent"""
-        impact_levels = {
-            0: 'monitoring',
-            1: 'water_approaching', 
-            2: 'partial_flooding',
-            3: 'severe_flooding'
-        }
-        return impact_levels.get(flood_stage, 'unknown')
+        return _FLOOD_IMPACT_LEVELS.get(flood_stage, 'unknown')
 
 class EnhancedFloodSimulation:
     """Enhanced simulation with LLM-generated message content"""
     
-    def __init__(self, agents_file: str = "venice_agents.ndjson", use_llm: bool = True):
+    def __init__(self, agents_file: str = "venice_agents.ndjson", use_llm: bool = True,
+                 batch_mode: bool = False, use_templates: bool = False):
         self.agents = {}
-        self.llm_generator = LLMMessageGenerator() if use_llm else None
+        self.llm_generator = (LLMMessageGenerator(max_concurrency=16, use_templates=use_templates)
+                              if use_llm else None)
         self.use_llm = use_llm
+        # Offline runs: queue every message as a Batch API request and fill content when the batch completes
+        self.batch_mode = batch_mode
+        self.batch_poll_interval = 30.0
+        self._batch_lines: List[Dict[str, Any]] = []
+        self._batch_messages: Dict[str, Tuple[Tuple, EnhancedMessage]] = {}
+        # Live mode: a tick's messages are generated several per request
+        self.llm_messages_per_call = 16
+        # Content keys with a request in flight -> later messages waiting on its content
+        self._inflight_content: Dict[Tuple, List[EnhancedMessage]] = {}
+        # Agent sampling, partner choice and delivery failures - reseeded per scenario run
+        self.rng = random.Random()
         self.load_agents(agents_file)
         self.message_log = []
         self.tick_snapshots = []
@@ -208,6 +486,10 @@ class EnhancedFloodSimulation:
                 agent = EnhancedVeniceAgent(agent_data)
                 self.agents[agent.agent_id] = agent
         
+        self._build_capability_index()
+        self._build_status_tables()
+        if self.llm_generator:
+            self.llm_generator.compile_agent_prompts(self.agents)
         print(f"Loaded {len(self.agents)} enhanced agents (LLM: {self.use_llm})")
     
     def generate_enhanced_message(self, sender_agent, intent: str, target: str, need: str = None):
@@ -224,8 +506,16 @@ class EnhancedFloodSimulation:
     
     def run_enhanced_scenario(self, scenario_name: str, max_ticks: int = 60, **params):
         """Run enhanced scenario with LLM-generated content"""
+        return asyncio.run(self.arun_enhanced_scenario(scenario_name, max_ticks, **params))
+    
+    async def arun_enhanced_scenario(self, scenario_name: str, max_ticks: int = 60, **params):
+        """Run enhanced scenario, generating each tick's messages concurrently"""
         print(f"\n=== Running Enhanced Scenario {scenario_name} ===")
-        print(f"Debug: OpenAI API Key available: {bool(os.getenv('OPENAI_API_KEY'))}")
+        logger.debug(f"OpenAI API key available: {bool(OPENAI_API_KEY)}")
+        
+        if not (self.use_llm and self.llm_generator):
+            # Require LLM for enhanced simulation - no fallback content
+            raise RuntimeError("Enhanced simulation requires OpenAI API key. No mock content will be generated.")
         
         # Reset state
         for agent in self.agents.values():
@@ -233,6 +523,7 @@ class EnhancedFloodSimulation:
             agent.message_queue = []
             agent.unmet_needs = []
             agent.last_update_tick = 0
+        self._status_arr.fill(self._status_code('normal'))
         
         self.message_log = []
         self.current_tick = 0
@@ -241,113 +532,283 @@ class EnhancedFloodSimulation:
         flood_progression = [0] * 10 + [1] * 10 + [2] * 20 + [3] * 20
         
         p_fail = params.get('p_fail', 0.1)
+        # Reruns with the same seed sample the same agents, partners and failures; without one the
+        # run is seeded from random, leaving the process-wide stream to its other users
+        seed = params.get('seed')
+        self.rng = random.Random(seed if seed is not None else random.getrandbits(64))
         
-        for tick in range(max_ticks):
-            self.current_tick = tick
-            
-            if tick < len(flood_progression):
-                old_stage = self.flood_stage
-                self.flood_stage = flood_progression[tick]
-                if old_stage != self.flood_stage:
-                    print(f"  Debug: Flood stage {old_stage} → {self.flood_stage} at tick {tick}")
-            
-            # Process sample of agents per tick (to manage LLM costs)
-            active_agents = random.sample(list(self.agents.keys()), 
-                                        min(15, len(self.agents)))  # More agents for testing
-            
-            tick_messages = 0
-            for agent_id in active_agents:
-                agent = self.agents[agent_id]
+        self._batch_lines, self._batch_messages = [], {}
+        self._inflight_content = {}
+        generating = deque()  # (tick, pending, content task) for ticks not yet logged
+        
+        # Messages are written as each tick completes (batch mode: once the batch has filled their content)
+        log_file = f"enhanced_message_log_{scenario_name}.ndjson"
+        message_stream = open(log_file, 'w', buffering=1 << 20)
+        self.llm_generator.open_session()
+        try:
+            for tick in range(max_ticks):
+                self.current_tick = tick
                 
-                # Update agent status more aggressively
-                stage_key = f'stage_{self.flood_stage}'
-                new_status = agent.risk_escalation.get(stage_key, 'emergency')
-                status_changed = new_status != agent.status
-                agent.status = new_status
+                if tick < len(flood_progression):
+                    old_stage = self.flood_stage
+                    self.flood_stage = flood_progression[tick]
+                    if old_stage != self.flood_stage:
+                        print(f"  Debug: Flood stage {old_stage} → {self.flood_stage} at tick {tick}")
                 
-                # Generate status update if status changed significantly
-                if status_changed and new_status in ['critical', 'emergency']:
-                    if tick % 3 == 0:  # More frequent status updates
-                        print(f"  Debug: Generating status update for {agent.place_name} ({new_status})")
-                        try:
-                            msg = self.generate_enhanced_message(
-                                agent, 'status_update', 'broadcast'
-                            )
-                            self.send_enhanced_message(msg, p_fail)
-                            tick_messages += 1
-                        except Exception as e:
-                            print(f"  Debug: LLM generation failed: {e}")
+                # Process sample of agents per tick (to manage LLM costs)
+                active_agents = self.rng.sample(self._agent_ids, 
+                                            min(15, len(self.agents)))  # More agents for testing
                 
-                # Generate support requests for unmet needs
-                if new_status in ['critical', 'emergency'] and tick % 5 == 0:
-                    # Add unmet needs more aggressively
-                    if new_status == 'emergency':
-                        if 'evacuation' not in agent.unmet_needs:
-                            agent.unmet_needs.append('evacuation')
-                    if self.flood_stage >= 2:
-                        if 'power' not in agent.unmet_needs:
-                            agent.unmet_needs.append('power')
-                        if 'protection' not in agent.unmet_needs:
-                            agent.unmet_needs.append('protection')
+                # Status pass for the sample: new status codes and which changed to an urgent status
+                active_index = np.fromiter((self._agent_index[agent_id] for agent_id in active_agents),
+                                           dtype=np.intp, count=len(active_agents))
+                new_codes = self._risk_codes[active_index, self.flood_stage]
+                urgent = np.isin(new_codes, _URGENT_STATUS_CODES)
+                escalated = (new_codes != self._status_arr[active_index]) & urgent
+                self._status_arr[active_index] = new_codes
+                
+                # (message, content key, prompt) per message - prompt is None when content is known or in flight.
+                # The p_fail draw is taken when the message is queued, before its content is generated, so
+                # the stream does not depend on which generations succeed (a failed one still used its draw)
+                pending = []
+                logged_before_tick = len(self.message_log)
+                for position, agent_id in enumerate(active_agents):
+                    agent = self.agents[agent_id]
+                    
+                    # Update agent status more aggressively
+                    new_status = self._status_names[new_codes[position]]
+                    agent.status = new_status
                     
-                    # Request support for one unmet need
-                    if agent.unmet_needs:
-                        need = random.choice(agent.unmet_needs)
-                        partners = self.find_support_partners(agent, need)
+                    # Generate status update if status changed significantly
+                    if escalated[position]:
+                        if tick % 3 == 0:  # More frequent status updates
+                            print(f"  Debug: Generating status update for {agent.place_name} ({new_status})")
+                            self.queue_enhanced_message(pending, agent, 'status_update', 'broadcast',
+                                                        self.rng.random() < p_fail)
+                    
+                    # Generate support requests for unmet needs
+                    if urgent[position] and tick % 5 == 0:
+                        # Add unmet needs more aggressively
+                        if new_status == 'emergency':
+                            if 'evacuation' not in agent.unmet_needs:
+                                agent.unmet_needs.append('evacuation')
+                        if self.flood_stage >= 2:
+                            if 'power' not in agent.unmet_needs:
+                                agent.unmet_needs.append('power')
+                            if 'protection' not in agent.unmet_needs:
+                                agent.unmet_needs.append('protection')
                         
-                        if partners:
-                            target = random.choice(partners)
-                            print(f"  Debug: Generating help request from {agent.place_name} to {target} for {need}")
-                            try:
-                                msg = self.generate_enhanced_message(
-                                    agent, 'request_support', target, need
-                                )
-                                self.send_enhanced_message(msg, p_fail)
-                                tick_messages += 1
-                            except Exception as e:
-                                print(f"  Debug: LLM generation failed: {e}")
+                        # Request support for one unmet need
+                        if agent.unmet_needs:
+                            need = self.rng.choice(agent.unmet_needs)
+                            partners = self.find_support_partners(agent, need)
+                            
+                            if partners:
+                                target = self.rng.choice(partners)
+                                print(f"  Debug: Generating help request from {agent.place_name} to {target} for {need}")
+                                self.queue_enhanced_message(pending, agent, 'request_support', target,
+                                                            self.rng.random() < p_fail, need)
+                
+                if self.batch_mode:
+                    if tick % 10 == 0:
+                        self._report_tick(tick, len(self.message_log) - logged_before_tick)
+                    continue
+                
+                # Content is generated in the background while the next ticks are simulated;
+                # ticks are logged in order as their content arrives
+                generating.append((tick, pending, asyncio.create_task(self.generate_tick_content(pending))))
+                await asyncio.sleep(0)  # Let the tick's requests start
+                while generating and generating[0][2].done():
+                    tick_done, pending_done, _ = generating.popleft()
+                    self._finish_tick(tick_done, pending_done, message_stream)
+            
+            while generating:
+                tick_done, pending_done, task = generating.popleft()
+                await task
+                self._finish_tick(tick_done, pending_done, message_stream)
             
-            if tick % 10 == 0:
-                print(f"  Tick {tick}: {tick_messages} enhanced messages generated this tick")
+            if self.batch_mode:
+                await self.complete_content_batch(scenario_name)
+                self._write_messages(message_stream, self.message_log)
+        finally:
+            for _, _, task in generating:
+                task.cancel()
+            message_stream.close()
+            await self.llm_generator.close_session()
         
         print(f"Enhanced scenario {scenario_name} complete: {len(self.message_log)} messages")
-        
-        # Save enhanced results
-        log_file = f"enhanced_message_log_{scenario_name}.ndjson"
-        with open(log_file, 'w') as f:
-            for msg in self.message_log:
-                f.write(json.dumps(msg.to_dict()) + '\n')
-        
         print(f"Enhanced results saved: {log_file}")
         return self.message_log
     
-    def send_enhanced_message(self, message: EnhancedMessage, p_fail: float):
-        """Send enhanced message with failure handling"""
-        if random.random() < p_fail:
-            message.success = False
+    def _finish_tick(self, tick: int, pending: List[Tuple[EnhancedMessage, Tuple, Optional[str]]], message_stream):
+        """Log and write a tick's messages once their content has arrived"""
+        logged_before_tick = len(self.message_log)
+        for msg, content_key, prompt in pending:
+            if prompt is not None and content_key is not None:
+                # Later messages that waited on this request share its content
+                for waiting in self._inflight_content.pop(content_key, ()):
+                    waiting.content = msg.content
+                if not isinstance(msg.content, Exception):
+                    self.llm_generator.cache_content(content_key, msg.content)
+            if isinstance(msg.content, Exception):
+                print(f"  Debug: LLM generation failed: {msg.content}")
+                continue
+            self.message_log.append(msg)
+        
+        self._write_messages(message_stream, self.message_log[logged_before_tick:])
+        if tick % 10 == 0:
+            self._report_tick(tick, len(self.message_log) - logged_before_tick)
+    
+    def _report_tick(self, tick: int, tick_messages: int):
+        print(f"  Tick {tick}: {tick_messages} enhanced messages generated this tick"
+              f"{f' ({self.llm_generator.template_hits} templated so far)' if self.llm_generator.use_templates else ''}")
+    
+    @staticmethod
+    def _write_messages(stream, messages: List[EnhancedMessage]):
+        stream.writelines(json.dumps(msg.to_dict()) + '\n' for msg in messages)
+    
+    def queue_enhanced_message(self, pending: List, agent: EnhancedVeniceAgent, intent: str, target: str,
+                               failed: bool, need: str = None):
+        """Queue a message for this tick's concurrent generation, or for the scenario batch in batch mode"""
+        
+        # The same agent saying the same thing to the same recipient in the same situation reuses its
+        # earlier content (the prompt names the recipient; broadcasts all share target 'broadcast')
+        content_key = (agent.agent_id, intent, agent.status, self.flood_stage, need, target)
+        content = self.llm_generator.get_cached_content(content_key)
+        if content is None and self.llm_generator.use_templates:
+            content = self.llm_generator.maybe_template(agent.place_name, agent.sector, agent.status,
+                                                        intent, target, self.flood_stage, need)
+            if content is not None:
+                content_key = None  # Fixed wording is not cached
+        
+        message = agent.build_enhanced_message(intent, target, self.current_tick, self.flood_stage, content, need)
+        message.success = not failed
+        
+        if not self.batch_mode:
+            prompt = None
+            if content is None:
+                waiting = self._inflight_content.get(content_key)
+                if waiting is not None:
+                    # An earlier tick's request for the same content is still running
+                    waiting.append(message)
+                else:
+                    # Prompt is built now, from the agent's current state; generate_tick_content fills the content
+                    prompt = self.llm_generator.build_agent_message_prompt(
+                        agent, intent, target, self.current_tick, self.flood_stage, need
+                    )
+                    self._inflight_content[content_key] = []
+            pending.append((message, content_key, prompt))
+            return
         
         self.message_log.append(message)
-        return message.success
+        if content is None:
+            # Content stays empty until complete_content_batch fills it
+            custom_id = f"{agent.agent_id}_{self.current_tick}_{intent}"
+            prompt = self.llm_generator.build_agent_message_prompt(
+                agent, intent, target, self.current_tick, self.flood_stage, need
+            )
+            self._batch_lines.append(self.llm_generator.prepare_batch_request(
+                custom_id, prompt, self.llm_generator.message_model_for(intent, self.flood_stage)
+            ))
+            self._batch_messages[custom_id] = (content_key, message)
     
-    def find_support_partners(self, agent, need: str) -> List[str]:
-        """Simple partner matching for demonstration"""
-        partners = []
-        
-        capability_map = {
-            'evacuation': ['evacuation_route', 'mobility', 'emergency_response'],
-            'power': ['electricity', 'power_distribution'],
-            'medical_care': ['medical_care', 'emergency_treatment'],
-            'protection': ['emergency_response', 'security']
-        }
+    async def generate_tick_content(self, pending: List[Tuple[EnhancedMessage, Tuple, Optional[str]]]):
+        """Fill the content of a tick's queued messages, several messages per LLM request
+        
+        Requests are grouped by model and run concurrently. A message whose generation
+        failed gets the exception as its content.
+        """
+        by_model: Dict[str, List[Tuple[EnhancedMessage, str]]] = {}
+        for message, _, prompt in pending:
+            if prompt is not None:
+                model = self.llm_generator.message_model_for(message.intent, self.flood_stage)
+                by_model.setdefault(model, []).append((message, prompt))
+        
+        chunks = [(model, requests[start:start + self.llm_messages_per_call])
+                  for model, requests in by_model.items()
+                  for start in range(0, len(requests), self.llm_messages_per_call)]
+        results = await asyncio.gather(*(self._agenerate_chunk([prompt for _, prompt in chunk], model)
+                                         for model, chunk in chunks),
+                                       return_exceptions=True)
+        
+        for (_, chunk), contents in zip(chunks, results):
+            if isinstance(contents, Exception):
+                contents = [contents] * len(chunk)
+            for (message, _), content in zip(chunk, contents):
+                message.content = content
+    
+    async def _agenerate_chunk(self, prompts: List[str], model: str) -> List[Any]:
+        """Contents for prompts from one request, or one request per prompt if the combined answer is malformed"""
+        if len(prompts) > 1:
+            try:
+                return await self.llm_generator.agenerate_message_contents(prompts, model)
+            except MalformedBatchResponse as e:
+                print(f"  Debug: {e} - requesting the {len(prompts)} messages individually")
+        return await asyncio.gather(*(self.llm_generator.acomplete_message(prompt, model) for prompt in prompts),
+                                    return_exceptions=True)
+    
+    async def complete_content_batch(self, scenario_name: str):
+        """Run the queued requests as one batch and fill the content of every message"""
+        
+        batch_lines, messages = self._batch_lines, self._batch_messages
+        self._batch_lines, self._batch_messages = [], {}
         
-        required_caps = capability_map.get(need, [need])
+        print(f"Submitting {len(batch_lines)} LLM content requests as a batch")
+        responses = await self.llm_generator.arun_batch(
+            batch_lines, f"enhanced_batch_{scenario_name}.jsonl", self.batch_poll_interval
+        )
+        print(f"Loaded {len(responses)}/{len(batch_lines)} batch responses")
         
-        for other_agent in self.agents.values():
-            if (other_agent.agent_id != agent.agent_id and 
-                any(cap in other_agent.capabilities for cap in required_caps)):
-                partners.append(other_agent.agent_id)
+        for custom_id, (content_key, message) in messages.items():
+            message.content = responses.get(custom_id)
+            if message.content is None:
+                print(f"  Debug: LLM generation failed: no batch response for request {custom_id}")
+            else:
+                self.llm_generator.cache_content(content_key, message.content)
         
-        return partners[:3]
+        # No fallback content - messages without a response are dropped, as in live generation
+        self.message_log = [msg for msg in self.message_log if msg.content is not None]
+    
+    def _build_status_tables(self):
+        """Encode per-agent status escalation as an (agents x flood stages) table of status codes, in self.agents order"""
+        self._status_names = list(_STATUS_NAMES)
+        self._status_codes_by_name = {name: code for code, name in enumerate(self._status_names)}
+        self._agent_ids = list(self.agents.keys())
+        self._agent_index = {agent_id: index for index, agent_id in enumerate(self._agent_ids)}
+        self._risk_codes = np.array(
+            [[self._status_code(agent.risk_escalation.get(f'stage_{stage}', 'emergency')) for stage in range(4)]
+             for agent in self.agents.values()],
+            dtype=np.int8
+        ).reshape(len(self.agents), 4)
+        self._status_arr = np.array([self._status_code(agent.status) for agent in self.agents.values()],
+                                    dtype=np.int8)
+    
+    def _status_code(self, status: str) -> int:
+        code = self._status_codes_by_name.get(status)
+        if code is None:
+            code = self._status_codes_by_name[status] = len(self._status_names)
+            self._status_names.append(status)
+        return code
+    
+    def _build_capability_index(self):
+        """Inverted capability index over self.agents - capabilities never change during a run"""
+        self.capability_index: Dict[str, List[str]] = {}
+        for agent in self.agents.values():
+            for cap in set(agent.capabilities):
+                self.capability_index.setdefault(cap, []).append(agent.agent_id)
+        # Agents able to help with each need, in load order - filled on first request
+        self._need_partners: Dict[str, List[str]] = {}
+    
+    def find_support_partners(self, agent, need: str) -> List[str]:
+        """Simple partner matching for demonstration - the first three capable agents in load order"""
+        candidates = self._need_partners.get(need)
+        if candidates is None:
+            required_caps = _SUPPORT_CAPABILITY_MAP.get(need, [need])
+            capable = set().union(*(self.capability_index.get(cap, ()) for cap in required_caps))
+            candidates = self._need_partners[need] = [agent_id for agent_id in self.agents if agent_id in capable]
+        
+        # At most one of the first four candidates is the agent itself
+        return [agent_id for agent_id in candidates[:4] if agent_id != agent.agent_id][:3]
 
 def create_env_template():
     """Create .env template for OpenAI API configuration"""
@@ -372,7 +833,7 @@ def test_enhanced_simulation():
     print("=== TESTING ENHANCED VENICE SIMULATION ===\n")
     
     # Check for API key
-    if not os.getenv('OPENAI_API_KEY'):
+    if not OPENAI_API_KEY:
         print("⚠️  No OpenAI API key found in environment")
         print("   Creating .env template...")
         create_env_template()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Rate-limit-aware scheduling for concurrent OpenAI requests
+Shared by the genuine LLM framework and the LLM-enhanced message generator
+"""
+
+import asyncio
+import random
+import time
+from typing import Dict, Any
+from loguru import logger
+import openai
+
+# Transient API failures worth retrying with backoff
+RETRYABLE_LLM_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError
+)
+
+
+class AsyncTokenBucket:
+    """Token bucket refilled continuously at rate_per_minute, for RPM/TPM limits"""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self.refill_per_second = self.capacity / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until amount tokens are available and take them"""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.refill_per_second)
+
+
+def retry_delay(error: Exception, attempt: int, jitter: random.Random) -> float:
+    """Seconds to wait before retrying: the server's Retry-After when it sends one,
+    else exponential backoff with jitter (~1s, 2s, 4s ...), capped at 60s"""
+    response = getattr(error, 'response', None)
+    headers = response.headers if response is not None else {}
+    try:
+        if 'retry-after-ms' in headers:
+            return min(60.0, float(headers['retry-after-ms']) / 1000.0)
+        if 'retry-after' in headers:
+            return min(60.0, float(headers['retry-after']))
+    except ValueError:
+        pass  # HTTP-date Retry-After values fall back to backoff
+    return min(60.0, 2 ** (attempt - 1) + jitter.uniform(0, 1))
+
+
+def estimate_tokens(request: Dict[str, Any]) -> int:
+    """Rough token cost of a request: ~4 characters per prompt token plus the completion budget"""
+    prompt_chars = sum(len(message['content']) for message in request.get('messages', []))
+    return prompt_chars // 4 + request.get('max_tokens', 0)
+
+
+async def create_with_retries(client, request: Dict[str, Any], request_slots: asyncio.Semaphore,
+                              max_attempts: int, jitter: random.Random,
+                              request_budget: AsyncTokenBucket, token_budget: AsyncTokenBucket) -> str:
+    """Send one chat completion to client, retrying transient errors with backoff
+
+    Every attempt, retries included, takes its request and token budget first, so a burst
+    of 429s is retried within the rate limits. jitter should be a dedicated Random so backoff
+    stays off the simulation's seeded RNG.
+    """
+    tokens = estimate_tokens(request)
+    for attempt in range(1, max_attempts + 1):
+        await request_budget.acquire()
+        await token_budget.acquire(tokens)
+        try:
+            async with request_slots:
+                response = await client.chat.completions.create(**request)
+            return response.choices[0].message.content.strip()
+        except RETRYABLE_LLM_ERRORS as e:
+            if attempt == max_attempts:
+                raise
+            delay = retry_delay(e, attempt, jitter)
+            logger.warning(f"LLM call failed ({type(e).__name__}), retry {attempt}/{max_attempts - 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
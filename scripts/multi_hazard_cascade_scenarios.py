@@ -7,6 +7,8 @@ Building on Venice Flat Ontology simulation for complex disaster modeling
 import json
 import random
 import copy
+import heapq
+import itertools
 from dataclasses import dataclass, asdict
 from typing import List, Dict, Any, Optional, Set, Tuple
 from pathlib import Path
@@ -74,16 +76,40 @@ class MultiHazardCascadeSimulation(FloodSimulation):
         
         self.cascade_events: List[CascadeEvent] = []
         self.active_events: Set[str] = set()
+        # Min-heaps of (trigger_tick, seq, event) and (expire_tick, seq, event);
+        # seq keeps same-tick events in scheduling order
+        self._pending_events: List[Tuple[int, int, CascadeEvent]] = []
+        self._expiring_events: List[Tuple[int, int, CascadeEvent]] = []
+        self._event_seq = itertools.count()
         self.system_states: Dict[str, float] = {}
         self.interdependencies: List[SystemInterdependency] = []
         self.cascade_log: List[Dict] = []
         
+        self._build_agent_indexes()
+        
         # Initialize system states
         self.initialize_system_states()
         self.define_cyber_physical_interdependencies()
         
         logger.info(f"MultiHazardCascadeSimulation initialized with {len(self.interdependencies)} interdependencies")
     
+    def _build_agent_indexes(self):
+        """Inverted capability/sector indexes over self.agents - neither changes during a run"""
+        self._cap_index: Dict[str, List[str]] = {}
+        self._sector_index: Dict[str, List[str]] = {}
+        for agent_id, agent in self.agents.items():
+            for cap in set(agent.capabilities):
+                self._cap_index.setdefault(cap, []).append(agent_id)
+            self._sector_index.setdefault(agent.sector, []).append(agent_id)
+    
+    def agents_with(self, capabilities: List[str] = (), sectors: List[str] = ()) -> List[str]:
+        """Agents having any of the capabilities or belonging to any of the sectors, in load order"""
+        if len(capabilities) == 1 and not sectors:
+            return list(self._cap_index.get(capabilities[0], ()))
+        matching = set().union(*(self._cap_index.get(cap, ()) for cap in capabilities),
+                               *(self._sector_index.get(sector, ()) for sector in sectors))
+        return [agent_id for agent_id in self.agents if agent_id in matching]
+    
     def initialize_system_states(self):
         """Initialize cyber-physical system states"""
         systems = [
@@ -175,10 +201,8 @@ class MultiHazardCascadeSimulation(FloodSimulation):
         """Scenario: Ransomware attack during high tide flood"""
         
         # Select critical infrastructure agents
-        pump_agents = [aid for aid, agent in self.agents.items() 
-                      if 'pumping' in agent.capabilities]
-        emergency_agents = [aid for aid, agent in self.agents.items() 
-                           if 'emergency_response' in agent.capabilities]
+        pump_agents = self.agents_with(['pumping'])
+        emergency_agents = self.agents_with(['emergency_response'])
         
         events = [
             # Initial flood starts
@@ -210,8 +234,7 @@ class MultiHazardCascadeSimulation(FloodSimulation):
             # Communication systems overloaded
             CascadeEvent(
                 "comm_overload", HazardType.COMMUNICATION_FAILURE, 30, 40,
-                [aid for aid, agent in self.agents.items() 
-                 if 'coordination' in agent.capabilities], 0.7, ["ransomware_attack"],
+                self.agents_with(['coordination']), 0.7, ["ransomware_attack"],
                 {"network_congestion": 0.8, "priority_channels": True},
                 "Emergency communication channels overwhelmed"
             ),
@@ -219,8 +242,7 @@ class MultiHazardCascadeSimulation(FloodSimulation):
             # Social disruption from failed response
             CascadeEvent(
                 "public_panic", HazardType.SOCIAL_DISRUPTION, 40, 30,
-                [aid for aid, agent in self.agents.items() 
-                 if agent.sector in ['tourism', 'commercial']], 0.6, 
+                self.agents_with(sectors=['tourism', 'commercial']), 0.6, 
                 ["pump_failure", "comm_overload"],
                 {"social_media_spread": True, "misinformation": 0.4},
                 "Public panic due to failed flood response systems"
@@ -232,9 +254,7 @@ class MultiHazardCascadeSimulation(FloodSimulation):
     def _create_power_surge_scenario(self) -> List[CascadeEvent]:
         """Scenario: Power surge cascading through interconnected systems"""
         
-        power_dependent = [aid for aid, agent in self.agents.items() 
-                          if any(cap in ['electricity', 'pumping', 'coordination'] 
-                                for cap in agent.capabilities)]
+        power_dependent = self.agents_with(['electricity', 'pumping', 'coordination'])
         
         events = [
             CascadeEvent(
@@ -246,16 +266,14 @@ class MultiHazardCascadeSimulation(FloodSimulation):
             
             CascadeEvent(
                 "pump_degradation", HazardType.INFRASTRUCTURE_FAILURE, 20, 70,
-                [aid for aid, agent in self.agents.items() 
-                 if 'pumping' in agent.capabilities], 0.8, ["power_surge"],
+                self.agents_with(['pumping']), 0.8, ["power_surge"],
                 {"pump_efficiency": 0.3, "backup_power": False},
                 "Pump systems operating at reduced capacity"
             ),
             
             CascadeEvent(
                 "sensor_blackout", HazardType.INFRASTRUCTURE_FAILURE, 18, 60,
-                [aid for aid, agent in self.agents.items() 
-                 if 'monitoring' in agent.capabilities], 0.9, ["power_surge"],
+                self.agents_with(['monitoring']), 0.9, ["power_surge"],
                 {"blind_operations": True, "manual_monitoring": 0.2},
                 "Flood monitoring sensors offline"
             )
@@ -284,8 +302,7 @@ class MultiHazardCascadeSimulation(FloodSimulation):
             
             CascadeEvent(
                 "supply_disruption", HazardType.SUPPLY_CHAIN, 30, 90,
-                [aid for aid, agent in self.agents.items() 
-                 if agent.sector in ['commercial', 'emergency_response']], 0.7,
+                self.agents_with(sectors=['commercial', 'emergency_response']), 0.7,
                 ["major_flood", "nation_state_cyber"],
                 {"logistics_breakdown": True, "fuel_shortage": True,
                  "equipment_unavailable": True},
@@ -301,8 +318,7 @@ class MultiHazardCascadeSimulation(FloodSimulation):
         events = [
             CascadeEvent(
                 "supply_crisis", HazardType.SUPPLY_CHAIN, 40, 60,
-                [aid for aid, agent in self.agents.items() 
-                 if 'emergency_response' in agent.capabilities], 0.6, [],
+                self.agents_with(['emergency_response']), 0.6, [],
                 {"fuel_shortage": True, "equipment_delays": True,
                  "maintenance_parts": False},
                 "Supply chain disruption affects flood response equipment"
@@ -314,8 +330,7 @@ class MultiHazardCascadeSimulation(FloodSimulation):
     def _create_communication_breakdown_scenario(self) -> List[CascadeEvent]:
         """Scenario: Communication network failure cascade"""
         
-        comm_agents = [aid for aid, agent in self.agents.items() 
-                      if 'coordination' in agent.capabilities]
+        comm_agents = self.agents_with(['coordination'])
         
         events = [
             CascadeEvent(
@@ -338,9 +353,7 @@ class MultiHazardCascadeSimulation(FloodSimulation):
     def _create_infrastructure_aging_scenario(self) -> List[CascadeEvent]:
         """Scenario: Aging infrastructure failures during stress"""
         
-        infrastructure_agents = [aid for aid, agent in self.agents.items() 
-                                if any(cap in ['pumping', 'emergency_response', 'electricity'] 
-                                      for cap in agent.capabilities)]
+        infrastructure_agents = self.agents_with(['pumping', 'emergency_response', 'electricity'])
         
         events = [
             CascadeEvent(
@@ -357,8 +370,7 @@ class MultiHazardCascadeSimulation(FloodSimulation):
     def _create_social_media_panic_scenario(self) -> List[CascadeEvent]:
         """Scenario: Social media amplified panic and misinformation"""
         
-        public_spaces = [aid for aid, agent in self.agents.items() 
-                        if agent.sector in ['tourism', 'commercial', 'transport']]
+        public_spaces = self.agents_with(sectors=['tourism', 'commercial', 'transport'])
         
         events = [
             CascadeEvent(
@@ -375,9 +387,7 @@ class MultiHazardCascadeSimulation(FloodSimulation):
     def _create_sensor_failure_scenario(self) -> List[CascadeEvent]:
         """Scenario: Sensor network failure creates blind spots"""
         
-        monitoring_agents = [aid for aid, agent in self.agents.items() 
-                           if any(cap in ['monitoring', 'emergency_response'] 
-                                 for cap in agent.capabilities)]
+        monitoring_agents = self.agents_with(['monitoring', 'emergency_response'])
         
         events = [
             CascadeEvent(
@@ -533,7 +543,7 @@ class MultiHazardCascadeSimulation(FloodSimulation):
                 
                 # Only create event if it doesn't already exist and we haven't exceeded cascade depth
                 if (event_key not in self.created_cascade_events and
-                    len([e for e in self.cascade_events if e.event_id.startswith('cascade_')]) < 50):
+                    len(self.created_cascade_events) < 50):
                     
                     # Create secondary cascade event
                     secondary_event = CascadeEvent(
@@ -552,12 +562,18 @@ class MultiHazardCascadeSimulation(FloodSimulation):
                     secondary_event.affected_agents = self.get_agents_for_system(interdep.system_b)
                     
                     # Schedule secondary event and track it
-                    self.cascade_events.append(secondary_event)
+                    self.schedule_cascade_event(secondary_event)
                     self.created_cascade_events.add(event_key)
                     
                     logger.warning(f"Cascade propagation: {interdep.system_a} → {interdep.system_b} "
                                  f"(strength: {impact_strength:.2f}, delay: {interdep.propagation_delay})")
     
+    def schedule_cascade_event(self, event: CascadeEvent):
+        """Add an event to the scenario and queue it for triggering at its trigger_tick"""
+        seq = next(self._event_seq)
+        self.cascade_events.append(event)
+        heapq.heappush(self._pending_events, (event.trigger_tick, seq, event))
+    
     def get_agents_for_system(self, system_name: str) -> List[str]:
         """Get agents associated with a particular system"""
         
@@ -575,12 +591,7 @@ class MultiHazardCascadeSimulation(FloodSimulation):
         
         required_capabilities = system_capability_map.get(system_name, [])
         
-        agents = []
-        for agent_id, agent in self.agents.items():
-            if any(cap in agent.capabilities for cap in required_capabilities):
-                agents.append(agent_id)
-        
-        return agents
+        return self.agents_with(required_capabilities)
     
     def run_multi_hazard_scenario(self, scenario_name: str, max_ticks: int = 120, **scenario_params):
         """Run a multi-hazard cascade scenario"""
@@ -591,7 +602,8 @@ class MultiHazardCascadeSimulation(FloodSimulation):
         self.reset_simulation()
         
         # Create scenario events
-        self.cascade_events = self.create_cyber_physical_cascade_scenario(scenario_name)
+        for event in self.create_cyber_physical_cascade_scenario(scenario_name):
+            self.schedule_cascade_event(event)
         
         logger.info(f"Loaded {len(self.cascade_events)} cascade events for scenario {scenario_name}")
         
@@ -600,20 +612,24 @@ class MultiHazardCascadeSimulation(FloodSimulation):
             self.current_tick = tick
             
             # Check for cascade events to trigger
-            events_to_trigger = [e for e in self.cascade_events 
-                               if e.trigger_tick == tick and e.event_id not in self.active_events]
-            
-            for event in events_to_trigger:
+            events_to_trigger = []
+            while self._pending_events and self._pending_events[0][0] <= tick:
+                trigger_tick, seq, event = heapq.heappop(self._pending_events)
+                # Events scheduled for a tick already past never fire
+                if trigger_tick == tick and event.event_id not in self.active_events:
+                    events_to_trigger.append((seq, event))
+            
+            for seq, event in events_to_trigger:
                 self.apply_cascade_effects(event, tick)
                 self.active_events.add(event.event_id)
+                heapq.heappush(self._expiring_events, (event.trigger_tick + event.duration, seq, event))
             
             # Remove expired events
-            expired_events = [e for e in self.cascade_events 
-                            if e.trigger_tick + e.duration <= tick and e.event_id in self.active_events]
-            
-            for event in expired_events:
-                self.active_events.remove(event.event_id)
-                logger.info(f"Cascade event {event.event_id} expired at tick {tick}")
+            while self._expiring_events and self._expiring_events[0][0] <= tick:
+                _, _, event = heapq.heappop(self._expiring_events)
+                if event.event_id in self.active_events:
+                    self.active_events.remove(event.event_id)
+                    logger.info(f"Cascade event {event.event_id} expired at tick {tick}")
             
             # Update flood stage (base hazard)
             self.update_flood_progression(tick, max_ticks)
@@ -675,6 +691,9 @@ class MultiHazardCascadeSimulation(FloodSimulation):
         self.current_tick = 0
         self.flood_stage = 0
         self.active_events = set()
+        self.cascade_events = []
+        self._pending_events = []
+        self._expiring_events = []
         
         # Reset cascade event tracking to prevent infinite loops
         self.created_cascade_events = set()
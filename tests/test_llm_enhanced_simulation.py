@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from llm_enhanced_simulation import EnhancedFloodSimulation, LLMMessageGenerator, MalformedBatchResponse
+
+split_batch_response = LLMMessageGenerator._split_batch_response
+
+
+def test_split_batch_response_returns_blocks_in_order():
+    text = "MESSAGE 1:\nPumps at San Marco are holding.\nMESSAGE 2:\nWe need sandbags at Rialto."
+
+    assert split_batch_response(text, 2) == [
+        "Pumps at San Marco are holding.",
+        "We need sandbags at Rialto.",
+    ]
+
+
+def test_split_batch_response_raises_on_missing_block():
+    text = "MESSAGE 1:\nFirst.\nMESSAGE 3:\nThird."
+
+    with pytest.raises(MalformedBatchResponse, match=r"\[2\]"):
+        split_batch_response(text, 3)
+
+
+def test_split_batch_response_reorders_out_of_order_blocks():
+    text = "MESSAGE 2: Second.\nMESSAGE 1: First."
+
+    assert split_batch_response(text, 2) == ["First.", "Second."]
+
+
+class _MalformedBatchGenerator:
+    """Stands in for LLMMessageGenerator: combined answers are malformed, single ones succeed"""
+
+    async def agenerate_message_contents(self, prompts, model=None):
+        raise MalformedBatchResponse("LLM batch response missing messages [2]")
+
+    async def acomplete_message(self, prompt, model):
+        return f"answer to {prompt}"
+
+
+def test_malformed_batch_falls_back_to_one_request_per_prompt():
+    sim = EnhancedFloodSimulation.__new__(EnhancedFloodSimulation)
+    sim.llm_generator = _MalformedBatchGenerator()
+
+    contents = asyncio.run(sim._agenerate_chunk(["a", "b"], "gpt-4o-mini"))
+
+    assert contents == ["answer to a", "answer to b"]